@@ -5,27 +5,75 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-import os, time
+import os, time, tracemalloc
+
+from covid_data import load_store
+from covid_engine import load_store_engine, read_report
+from covid_refresh import load_version, start_refresher
+from covid_reports import build_daily_counts, window_report, window_regions
+from covid_figures import make_figures, make_period_figures, serialize_figures, payload_sizes
+from covid_profile import new_run, stage, cache_miss, cached_call, run_timings, cache_counts, export_log
 
 # Dataset of COVID-19 positive cases in Colombia (GOV.CO)
 # https://www.datos.gov.co/Salud-y-Protecci-n-Social/Casos-positivos-de-COVID-19-en-Colombia/gt2j-8ykr/data
 
-# Shows some information when probing
+# Shows some information when probing: timing and memory of every stage in the sidebar
 DEBUG = False
 
+# File where the timing log is exported on every run when DEBUG is on ('.json' or '.csv')
+PROFILE_LOG = 'covid_profile.csv'
+
 # COVID csv dataset file
 FILE = 'Casos_positivos_de_COVID-19_en_Colombia.csv'
+
+# Rows read at once from the csv file, None reads the whole file
+# (set it in servers without memory for the complete dataset)
+CHUNK_SIZE = None
+
+# Most processes used to parse the csv file when it is read whole, files smaller than
+# PARALLEL_MIN_BYTES (see covid_data.py) per process are parsed with fewer of them
+WORKERS = min(4, os.cpu_count() or 1)
+
+# Folder of the data store shared by all sessions and server processes, None
+# uses '.covid_cache' next to the csv file (a folder in /dev/shm keeps it in RAM)
+STORE_DIR = None
+
+# Seconds between checks of the csv file: a new file is loaded in the background while
+# the sessions keep showing the previous data, then all of them show the new data
+REFRESH_INTERVAL = 60
+
+# Precomputes all the reports of every new version in the background (see precompute.py),
+# new versions of a store precomputed with precompute.py are always precomputed too
+PRECOMPUTE = False
+
+# Most figures of reports kept in the cache, the oldest ones are dropped
+FIGURE_CACHE_ENTRIES = 500
+
+# Days of the rolling average and of the recent cases of the selected period
+ROLLING_DAYS = 7
+RECENT_DAYS = 14
+
+# Optional csv file with the inhabitants of every region, to show the incidence of the
+# selected period: columns 'Nombre departamento', 'Nombre municipio' (empty for the
+# whole department) and 'Población'
+POPULATION_FILE = 'poblacion.csv'
 #////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
 #//                                                                                                                                    //
 #//                                                             FUNCTIONS                                                              //
 #//                                                                                                                                    //
 #////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
 
-# Caches the information
-@st.cache(persist=True)
-def load_csv_data(address):
+# Caches the information of the version of the data served, 'path' (the folder of its
+# store) changes with the content of the csv file. Just one version is kept, so the memory
+# maps of an old store are released once the new one is loaded and its files deleted.
+# The data is a read-only memory map of the store shared by all sessions and server
+# processes, it can't be changed so it isn't hashed by the cache on every access.
+@st.cache(allow_output_mutation=True, max_entries=1)
+def load_csv_data(path):
     '''
-    Action: Loads and organizes COVID-19's data from csv dataset
+    Action: Loads and organizes COVID-19's data from csv dataset. The csv is
+            parsed once into a columnar store (see covid_refresh.py), this
+            reads the store.
 
     Output
     Returns a tuple with three items:
@@ -34,241 +82,144 @@ def load_csv_data(address):
         3. ndarray with all Colombia municipalities.
     '''
     print("Reading data...")
+    cache_miss('load_csv_data')
 
-    # Names of the columns to read from the csv file
-    read_col = ['ID de caso','Fecha de notificación','Nombre municipio','Nombre departamento','Ubicación del caso', 'Recuperado',
-                'Edad','Sexo','Estado','Fecha de muerte','Fecha de diagnóstico','Fecha de recuperación', 'fecha reporte web']
-
-    #Reads the csv file and converts it to a DataFrame
-    data = pd.read_csv(address, usecols = read_col, low_memory = False)
-
-    # Replace in 'Sex' the values filled with 'f' and 'm' by 'F' and 'M'
-    data = data.replace({'Sexo': {'f': 'F', 'm': 'M'}})
-
-    # Replace in 'Sex' the values filled with 'F' and 'M' by 'Femenino' and 'Masculino'
-    data = data.replace({'Sexo': {'F': 'Femenino', 'M': 'Masculino'}})
-
-    # Some special districts are changed to its respective department
-    data = data.replace({'Nombre departamento': {'BARRANQUILLA': 'ATLANTICO',
-                                                      'CARTAGENA': 'BOLIVAR',
-                                                      'Buenaventura D.E.': 'VALLE',
-                                                      'STA MARTA D.E.': 'MAGDALENA'}})
-
-    # Replace nan values with 'Fallecido NO COVID' in the 'Ubicación del caso' column
-    data['Ubicación del caso'] = data['Ubicación del caso'].fillna('Fallecido NO COVID')
-
-    # Replace nan values with 'N/A' in the 'Estado' column
-    data['Estado'] = data['Estado'].fillna('N/A')
-
-    # Takes all departments and municipalities with COVID cases reported
-    dptos = data['Nombre departamento'].dropna().unique()
-    towns = data['Nombre municipio'].dropna().unique()
-
-    # Date in format 'dd/mm/yyyy' is changed to 'yyyy-mm-dd' format in all date columns
-    data['fecha reporte web'] = pd.to_datetime(data['fecha reporte web'], infer_datetime_format=True, dayfirst=True)
-    data['Fecha de muerte'] = pd.to_datetime(data['Fecha de muerte'], infer_datetime_format=True, dayfirst=True)
-    data['Fecha de notificación'] = pd.to_datetime(data['Fecha de notificación'], infer_datetime_format=True, dayfirst=True)
-    data['Fecha de diagnóstico'] = pd.to_datetime(data['Fecha de diagnóstico'], infer_datetime_format=True, dayfirst=True)
-    data['Fecha de recuperación'] = pd.to_datetime(data['Fecha de recuperación'], infer_datetime_format=True, dayfirst=True)
-
-    # Changes all cases of same field written different in some columns
-    data = data.replace({'Ubicación del caso': {'casa': 'Casa', 'CASA': 'Casa'}})
-    data = data.replace({'Estado': {'moderado': 'Moderado', 'LEVE': 'Leve', 'leve': 'Leve'}})
-    data = data.replace({'Recuperado': {'fallecido': 'Fallecido'}})
-
-    #A different way to capitalize fields in a column is using 's.str.capitalize()'
-    #method, where 's' is a pandas serie.
-
-    return (data, dptos, towns)
+    return load_store(path)
 #=======================================================================================================================================#
 #=======================================================================================================================================#
-def data_report(info, report, label, acum = False):
+# Caches the information of the version of the data served (see load_csv_data).
+# Read-only memory map of the store too, it isn't hashed on every access.
+@st.cache(allow_output_mutation=True, max_entries=1)
+def load_cube(path):
     '''
-    Inputs:
-        acum   -> True:  process the accumulated sum
-                  False: process the partial sum
+    Action: Loads the aggregate cube of the COVID-19's data (see build_cube)
+            saved with the data, every chart of the dashboard is made from it.
 
-        info   -> An object of type Pandas DataFrame with at least two columns:
-                  one called with name in 'report' param and the other 'ID de caso'
-                  this must be the second column of the Dataframe
-
-        report -> String with the column name of the report needed
+    Output:
+        Returns a tuple with the folder of the store, the cube and its region
+        index (see load_store_engine). The reports precomputed in the store with
+        precompute.py are read from it instead of being made.
+    '''
+    cache_miss('load_cube')
 
-        label  -> String with the column name where the data sum will be written
+    return load_store_engine(path)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+# Caches the information of the version of the data served (see load_csv_data).
+# The prefix sums aren't changed, so they aren't hashed either.
+@st.cache(allow_output_mutation=True, max_entries=1)
+def load_daily_counts(path):
+    '''
+    Action: Loads the cases reported per day in every region (see build_daily_counts)
+            and the inhabitants of every region in POPULATION_FILE, if it exists.
 
     Output:
-        Returns an object of type DataFrame from the pandas library whose index
-        is the param 'report' and has a single column whose name is the respective
-        param 'label'
+        Returns a tuple with the dictionary of build_daily_counts and a dictionary
+        {region: inhabitants} (None if there isn't a POPULATION_FILE).
     '''
-    # Counts how many times each field in 'report' column is repeated and save
-    # it in 'ID de caso' column
-    info = info.groupby(report).count()[[info.columns[1]]]
+    cache_miss('load_daily_counts')
+    (store_path, all_cube, cube_index) = load_cube(path)
 
-    # 'ID de caso' is renamed to the string in 'label' param
-    info = info.rename(columns = {info.columns[0]:label})
+    population = None
+    if os.path.isfile(POPULATION_FILE):
+        regions = pd.read_csv(POPULATION_FILE)
+        population = {dpto if pd.isna(muni) else (dpto, muni): inhabitants for (dpto, muni, inhabitants)
+                      in zip(regions['Nombre departamento'], regions['Nombre municipio'], regions['Población'])}
 
-    # Acumulated sum in the 'report' column is made if 'acum' param is True
-    if acum :
-        info = info.cumsum()
-
-    return info
+    return (build_daily_counts(all_cube), population)
 #=======================================================================================================================================#
 #=======================================================================================================================================#
-# Caches the information
-@st.cache(persist=True)
-def get_summary(info, key_list, dpto_info = True):
+# Caches the figures of every report shown (type of report, region and type of patients),
+# so changing a filter back doesn't make them again, up to FIGURE_CACHE_ENTRIES (those of
+# old versions of the data are dropped first). The figures aren't changed when shown, so
+# they aren't hashed either.
+@st.cache(allow_output_mutation=True, max_entries=FIGURE_CACHE_ENTRIES)
+def load_figures(path, tipo_reporte, dpto, muni, tipo_grafica):
     '''
-    Inputs:
-        info      -> An object of type DataFrame from pandas.
-
-        key_list  -> List with all the departments or municipalities
-                     to obtain the report.
-
-        dpto_info -> True: Departmental report (default)
-                     False: Municipal report.
+    Action: Makes the figures of the report (see make_figures) with the long
+            time series downsampled. They are shown as they are on every rerun,
+            without being validated again.
 
     Output:
-        Returns an object of type DataFrame with five columns:
-
-            1. Departamento/Municipio, name of the department
-               or municipality from which the report is made.
-
-            2. Casos confirmados, number of accumulated cases confirmed.
+        Returns a tuple with two dictionaries: the figures and, when DEBUG is
+        on, the size in bytes of their JSON, plain and compressed (see
+        payload_sizes).
+    '''
+    cache_miss('load_figures')
+    (store_path, all_cube, cube_index) = load_cube(path)
 
-            3. Recuperados, number of recovered cases.
+    report = read_report(store_path, all_cube, cube_index, tipo_reporte, dpto, muni, tipo_grafica)
 
-            4. Fallecidos, number of deceased cases.
+    with stage('make figures'):
+        figures = make_figures(report, tipo_reporte, tipo_grafica)
 
-            5. Atendidos en UCI, number of cases seen in ICU.
+    sizes = payload_sizes(serialize_figures(figures)) if DEBUG else {}
 
-    '''
-    info = info.reset_index()
-    info = info.drop(columns=info.columns[0])
-
-    if dpto_info:
-        info = info.set_index('Nombre departamento')
-        col_name = 'Departamento'
-    else:
-        info = info.set_index('Nombre municipio')
-        col_name = 'Municipio'
-
-    info_dict = {}
-    diag_acum = []
-    recu = []
-    fallecidos = []
-    UCI = []
-
-    for key in key_list:
-
-        nun_fallecidos = 0
-        num_UCI = 0
-        num_recuperados = 0
-        casos_diag = 0
-
-        # Checks that the department/municipality info isn't a pandas series.
-        if not isinstance(info.loc[key], pd.Series):
-
-            # Takes number of accumulated cases.
-            casos_diag = data_report(info.loc[key], 'fecha reporte web', 'Casos', True).max()[0]
-
-            # Take cases based on their case location
-            d = data_report(info.loc[key], 'Ubicación del caso', 'Casos')
-
-            # Extract number of deceased patients
-            if 'Fallecido' in d.index:
-                nun_fallecidos = d.loc['Fallecido'].array[0]
-
-            # Extracts number of patients seen in ICU
-            if 'Hospital UCI' in d.index:
-                num_UCI = d.loc['Hospital UCI'].array[0]
-
-            # Take cases according to the recovered column
-            d = data_report(info.loc[key], 'Recuperado', 'Casos')
-
-            # Extract number of recovered patients
-            if 'Recuperado' in d.index:
-                num_recuperados = d.loc['Recuperado'].array[0]
-
-        # If department/municipality info is a pandas series
-        # it means that there's just one case confirmed.
-        else:
-            casos_diag = 1
-            atencion = info.loc[key].loc['Ubicación del caso']
-
-            # Checks patient care.
-            if atencion == 'Recuperado':
-                num_recuperados = 1
-            elif atencion == 'Fallecido':
-                nun_fallecidos = 1
-            elif atencion == 'Hospital UCI':
-                num_UCI = 1
-
-        diag_acum.append(casos_diag)
-        recu.append(num_recuperados)
-        fallecidos.append(nun_fallecidos)
-        UCI.append(num_UCI)
-
-    info_dict.setdefault(col_name, key_list)
-    info_dict.setdefault('Confirmados', diag_acum)
-    info_dict.setdefault('Recuperados', recu)
-    info_dict.setdefault('Fallecidos', fallecidos)
-    info_dict.setdefault('En UCI', UCI)
-
-    df = pd.DataFrame(data=info_dict)
-    df = df.sort_values(by = 'Confirmados', ascending = False).reset_index()
-    df.pop('index')
-
-    return df
+    return (figures, sizes)
 #=======================================================================================================================================#
 #=======================================================================================================================================#
-def get_info(csv_data, key_list, dpto_summary = True):
+# Caches the figures of every period and region shown, like load_figures, so reruns
+# made by other filters don't make them again.
+@st.cache(allow_output_mutation=True, max_entries=FIGURE_CACHE_ENTRIES)
+def load_period_figures(path, dpto, muni, start_day, end_day):
     '''
-    Inputs:
-        csv_data     -> Pandas DataFrame Type Object
-
-        key_list     -> List with all the departments or
-                        municipalities to obtain the report
+    Action: Makes the figures of the selected period (see make_period_figures)
+            from the prefix sums of the cases per day, with the regions of the
+            period only when no municipality is chosen.
 
-        dpto_summary -> True:  process the accumulated sum
-                        False: process the partial sum
     Output:
-        Returns a tuple with five elements:
-
-        1. cases, sum of diagnostic cases per day.
-        2. status, summary of patients according to their health status.
-        3. dpto_info, summary of data by department or municipality.
-        4. atention, summary of patients by case location.
-        5. recu, summary of patients by 'Recuperado' columns info.
+        Returns a tuple with the figures and a dictionary with the cases of the
+        period ('total'), of its last RECENT_DAYS days ('recent') and the last
+        rolling average ('average').
     '''
-    # Cumulative sum of diagnosed patients
-    cases = data_report(csv_data, 'fecha reporte web', 'Casos diagnosticados')
-
-    # Gets all departments or municipalities summary report depending on
-    # 'dpto_summary' param
-    if len(key_list) == 0:
-        dpto_info = None
-    else:
-        dpto_info = get_summary(csv_data, key_list, dpto_summary)
+    cache_miss('load_period_figures')
+    (daily, population) = load_daily_counts(path)
 
-    # Patients according to the type of location of the case
-    atention = data_report(csv_data, 'Ubicación del caso', 'Número de pacientes')
+    window = window_report(daily, start_day, end_day, dpto, muni, ROLLING_DAYS)
+    regions = window_regions(daily, start_day, end_day, dpto, RECENT_DAYS, population) if muni is None else None
 
-    # Patients according to medical status
-    status = data_report(csv_data, 'Estado', 'Número de pacientes')
+    with stage('make period figures'):
+        figures = make_period_figures(window, regions, ROLLING_DAYS)
 
-    # Patients according to the column 'Recuperado'
-    recu = data_report(csv_data, 'Recuperado', 'Número de pacientes')
+    cases = window['Casos diagnosticados']
+    stats = {'total': cases.sum(), 'recent': cases.iloc[-RECENT_DAYS:].sum(),
+             'average': window.iloc[-1, 1] if len(window) else 0}
 
-    return (cases, status, dpto_info, atention, recu)
+    return (figures, stats)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def show_chart(figures, name):
+    '''
+    Action: Shows the chart 'name' of the figures returned by load_figures,
+            timed as a stage.
+    '''
+    with stage('chart ' + name):
+        st.plotly_chart(figures[name])
 
 #////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
 #//                                                                                                                                    //
 #//                                                        STAGE OF PREPROCESS                                                         //
 #//                                                                                                                                    //
 #////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+# Every rerun of the script is timed as a new run
+new_run()
+if DEBUG and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+# Version of the data served in this run, it is built here only the first time, later
+# changes of the csv file are built in the background and served when they are ready
+with stage('load version'):
+    version = load_version(FILE, STORE_DIR, CHUNK_SIZE, WORKERS)
+    start_refresher(FILE, STORE_DIR, CHUNK_SIZE, WORKERS, REFRESH_INTERVAL, PRECOMPUTE)
+
 # Loads COVID information
-(all_data, all_dptos, all_muni) = load_csv_data(FILE)
+(all_data, all_dptos, all_muni) = cached_call('load_csv_data', load_csv_data, version['path'])
+
+# Number of cases by region, date and patient fields
+(store_path, all_cube, cube_index) = cached_call('load_cube', load_cube, version['path'])
+
+# Cases per day of every region, to query any period
+(daily, population) = cached_call('load_daily_counts', load_daily_counts, version['path'])
 
 # Hide the MENU icon
 hide_streamlit_style = """
@@ -296,40 +247,36 @@ st.sidebar.title('Filtros')
 tipo_reporte = st.sidebar.radio('Por tipo de reporte',['Nacional', 'Departamental', 'Municipal'])
 tipo_grafica = st.sidebar.radio('Por tipo de pacientes', ['Reportados', 'Fallecidos', 'Recuperados'])
 
-if tipo_reporte == 'Nacional':
-    report_data = all_data
-    report_list = all_dptos
-    report_name = 'Colombia'
-    summary_dpto = True
+with stage('region selection'):
+    dpto_select = None
+    muni_select = None
 
-elif tipo_reporte == 'Departamental':
-    # List of all departments
-    dpto_select = st.sidebar.selectbox('Departamento',all_dptos)
+    if tipo_reporte == 'Departamental':
+        # List of all departments
+        dpto_select = st.sidebar.selectbox('Departamento',all_dptos)
 
-    # Takes the departments as the index of the information
-    dpto_info = all_data.set_index('Nombre departamento')
+    elif tipo_reporte == 'Municipal':
+        # List of all departments
+        dpto_select = st.sidebar.selectbox('Departamento',all_dptos)
 
-    report_data = dpto_info.loc[dpto_select]
-    report_list = all_data[all_data['Nombre departamento'] == dpto_select]['Nombre municipio'].dropna().unique()
-    report_name = dpto_select
-    summary_dpto = False
+        # Takes municipalities in the selected department
+        muni_per_dpto = cube_index['dpto_munis'][dpto_select]
 
-elif tipo_reporte == 'Municipal':
-    # List of all departments
-    dpto_select = st.sidebar.selectbox('Departamento',all_dptos)
+        # Save the selected municipality
+        muni_select = st.sidebar.selectbox('Municipio',muni_per_dpto)
 
-    # Takes municipalities in the selected department
-    muni_per_dpto = all_data[all_data['Nombre departamento'] == dpto_select]['Nombre municipio'].unique()
+# Period of the section 'Periodo seleccionado', the whole history by default
+first_day = daily['dates'][0].date()
+last_day = daily['dates'][-1].date()
+periodo = st.sidebar.date_input('Periodo', [first_day, last_day], min_value = first_day, max_value = last_day)
 
-    # Save the selected municipality
-    muni_select = st.sidebar.selectbox('Municipio',muni_per_dpto)
+# While the range is chosen a single day is returned
+periodo = list(periodo) if isinstance(periodo, (list, tuple)) else [periodo]
+(start_day, end_day) = (periodo[0], periodo[-1])
 
-    muni_info = all_data.set_index(['Nombre departamento', 'Nombre municipio'])
-
-    report_data = muni_info.loc[dpto_select, :].loc[muni_select]
-    report_list = []
-    report_name = muni_select
-    summary_dpto = True
+# Version of the data shown and when it started to be served
+st.sidebar.markdown("Versión de los datos: `{}`  \nÚltima actualización: {}".format(
+                    version['version'], time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(version['refreshed']))))
 
 #////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
 #//                                                                                                                                    //
@@ -338,7 +285,8 @@ elif tipo_reporte == 'Municipal':
 #////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
 def general_info():
     '''
-    get_info() loads general information from COVID data and stores it in 5 variables:
+    read_report() loads general information from COVID data and make_figures()
+    plots it from 5 variables:
 
         |==========|========================================================|
         | Variable |                    Description                         |
@@ -350,38 +298,8 @@ def general_info():
         |     e    |  summary of patients by 'Recuperado' columns info.     |
         |==========|========================================================|
     '''
-(a, b, c, d, e) = get_info(report_data, report_list, summary_dpto)
-
-# Verifies if there are recovered and deceased cases according to the type of distribution chosen
-if (tipo_grafica == 'Recuperados' and 'Recuperado' in e.index) or (tipo_grafica == 'Fallecidos' and 'Fallecido' in e.index) or (tipo_grafica == 'Reportados'):
-
-    # Checks the type of distribution chosen to graph
-    if tipo_grafica != 'Reportados':
-        report_data = report_data.reset_index().set_index('Recuperado').loc[tipo_grafica[0:len(tipo_grafica)-1]]
-
-    # SEX data
-    sex_report = data_report(report_data, 'Sexo', 'Número de pacientes').reset_index()
-
-    # AGE data
-    age_data = report_data.copy()
-
-    # takes the 'Edad' column and converts it to Str type
-    age_data['Edad'] = age_data.loc[:,'Edad'].astype(str)
-
-    age_data = data_report(age_data, 'Edad', 'Número de pacientes').reset_index()
-
-    # Inclusive age range from left
-    bins = pd.IntervalIndex.from_tuples([(0, 10), (10, 20), (20, 30), (30, 40), (40, 50), (50, 60),
-                                         (60, 70), (70, 80), (80, 90), (90, 120)], closed = 'left')
-
-    # Interval labels
-    names = ["0 - 9", "10 - 19", "20 - 29", "30 - 39", "40 - 49","50 - 59", "60 - 69", "70 - 79", "80 - 89",
-             "Mayor de 89"]
-
-    age_data['Intervalos'] = pd.cut(age_data['Edad'].astype(int), bins)
-    age_data.pop('Edad')
-    age_data = age_data.groupby('Intervalos').sum().reset_index()
-    age_data['Intervalos'] = age_data['Intervalos'].categories = names
+(figures, sizes) = cached_call('load_figures', load_figures, version['path'], tipo_reporte, dpto_select, muni_select,
+                                tipo_grafica)
 
 #////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
 #//                                                                                                                                    //
@@ -389,46 +307,76 @@ if (tipo_grafica == 'Recuperados' and 'Recuperado' in e.index) or (tipo_grafica
 #//                                                                                                                                    //
 #////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
 # Graph of accumulated diagnosed cases
-fig1 = px.line(a.cumsum(), y = a.columns[0], labels={'fecha reporte web':'Fecha de reporte'},
-               title = "Histórico de casos reportados en " + report_name)
-st.plotly_chart(fig1)
+show_chart(figures, 'fig1')
 
 # Graph of diagnostic cases per day
-fig2 = px.line(a, y = a.columns[0], labels={'fecha reporte web':'Fecha de reporte'},
-               title = "Histórico de casos diarios reportados en " + report_name)
-st.plotly_chart(fig2)
+show_chart(figures, 'fig2')
 
 # Pie diagram according to the location of the patient's case
-fig_A = px.pie(e.reset_index(), values='Número de pacientes', names='Recuperado',
-               title='Distribución por atención de casos reportados')
-st.plotly_chart(fig_A)
+show_chart(figures, 'fig_A')
 
 # Pie diagram according to the status of the patients
-fig_B = px.pie(b.reset_index(), values='Número de pacientes', names='Estado',
-               title='Distribución por estado de casos reportados')
-st.plotly_chart(fig_B)
+show_chart(figures, 'fig_B')
 
-# Summary report is shown just if record type selected is either nacional or departmental
+# Summary report is shown just if record type selected is either nacional or departamental
 if tipo_reporte != 'Municipal':
     st.header("Resumen " + tipo_reporte.lower())
-    fig_C = px.bar(c, x = c.columns[0], y=[c.columns[4], c.columns[3], c.columns[2], c.columns[1]],
-                   labels={c.columns[0]:'', 'value': 'Número de pacientes', 'variable': 'Variable'})
-    st.plotly_chart(fig_C)
+    show_chart(figures, 'fig_C')
 
 st.markdown("## Para filtrar las gráficas siguientes use el filtro 'Por tipo de pacientes' ubicado al costado izquierdo")
 
-try:
+# Sex and age charts are missing if the chosen department or municipality has
+# no recovered or deceased patients
+if 'fig_D' in figures:
     # Sex pie diagram according to the chosen distribution
-    fig_D = px.pie(sex_report, values=sex_report.columns[1], names=sex_report.columns[0],
-                   title='Distribución por sexo de casos ' + tipo_grafica.lower())
-    st.plotly_chart(fig_D)
+    show_chart(figures, 'fig_D')
 
     # Bar chart by age according to the chosen distribution
-    fig_E = px.bar(age_data, x='Intervalos', y='Número de pacientes',
-                   labels={'Intervalos': 'Edad'},height=400, title = "Distribución por edad de casos " + tipo_grafica.lower())
-    st.plotly_chart(fig_E)
+    show_chart(figures, 'fig_E')
 
-# An exception would rise if both or either 'sex_report' and 'age_data' variables doesn't exists
-# what it means is that the chosen department or municipality has no recovered or deceased patients
-except NameError:
+else:
     st.markdown("### ❌ No existen pacientes " + tipo_grafica.lower())
+
+# Cases of the selected period, taken from the prefix sums of the cases per day
+with stage('selected period'):
+    st.header("Periodo seleccionado")
+
+    (period_figures, period) = cached_call('load_period_figures', load_period_figures, version['path'], dpto_select,
+                                           muni_select, start_day, end_day)
+
+    st.markdown("**{}** casos reportados del {} al {}, **{}** en los últimos {} días del periodo "
+                "(promedio de {} días: **{:.1f}**)".format(period['total'], start_day, end_day, period['recent'],
+                                                          RECENT_DAYS, ROLLING_DAYS, period['average']))
+
+    # Graph of diagnostic cases per day and their rolling average
+    show_chart(period_figures, 'fig_F')
+
+    # Cases of the period by department or municipality, not shown in municipal reports
+    if 'fig_G' in period_figures:
+        show_chart(period_figures, 'fig_G')
+
+#////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+#//                                                                                                                                    //
+#//                                                            DEBUG PANEL                                                             //
+#//                                                                                                                                    //
+#////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+if DEBUG:
+    st.sidebar.title('Depuración')
+
+    # Time and memory of every stage of this run (stages of cached functions only run on misses)
+    timings = pd.DataFrame(run_timings())
+    timings['memory'] = pd.to_numeric(timings['memory']) / 1024
+    st.sidebar.markdown('**Etapas de la ejecución**')
+    st.sidebar.table(timings[['stage', 'seconds', 'memory']].rename(columns = {'stage': 'Etapa', 'seconds': 'Segundos',
+                                                                              'memory': 'Memoria (KB)'}).set_index('Etapa').round(4))
+
+    # Hits and misses of the cached functions since the server started
+    st.sidebar.markdown('**Caché**')
+    st.sidebar.table(pd.DataFrame(cache_counts()).T.rename(columns = {'hits': 'Aciertos', 'misses': 'Fallos'}))
+
+    # Size of the data sent to the browser by every chart
+    st.sidebar.markdown('**Tamaño de las gráficas (KB)**')
+    st.sidebar.table(pd.DataFrame([(name, plain / 1024, packed / 1024) for (name, (plain, packed)) in sizes.items()],
+                                  columns = ['Gráfica', 'JSON', 'gzip']).set_index('Gráfica').round(1))
+
+    export_log(PROFILE_LOG)
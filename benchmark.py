@@ -0,0 +1,807 @@
+# Timing comparisons of the data stages of the dashboard.
+#
+# Usage:
+#       python benchmark.py {store|summary|cube|ages|figures|window|clean|memory|regions|update|chunked|parallel|shared} [csv_file]
+#       python benchmark.py suite [rows,rows,...]
+#
+# Use the complete dataset export as 'csv_file' to measure at national scale, or
+# the suite, which times the main stages over synthetic files of several sizes.
+import os, sys, json, time, tempfile, shutil, subprocess, tracemalloc
+import numpy as np
+import pandas as pd
+
+from covid_data import READ_COL, DATE_COL, DATE_FORMAT, CATEGORY_COL, INTEGER_COL, read_csv_data, load_data, clean_data, compact_data, build_region_index, region_rows, \
+                       open_store, load_store, load_store_cube, load_row_hash, read_manifest, read_csv_parallel, PARALLEL_MIN_BYTES, \
+                       read_raw_csv, row_hashes
+from covid_engine import load_engine, national_report
+from covid_figures import MAX_POINTS, lttb, make_figures, serialize_figures, load_figure, payload_sizes
+from synthetic_data import write_synthetic_csv
+from covid_reports import data_report, get_summary, get_info, build_cube, slice_cube, cube_info, cube_patients, \
+                          age_years, age_codes, age_histogram, AGE_NAMES, build_daily_counts, window_report, window_regions
+
+# COVID csv dataset file
+FILE = 'Casos_positivos_de_COVID-19_en_Colombia.csv'
+
+# Rows of the synthetic files of the suite, the folder where they are kept and
+# the file with the times of every run of the suite
+SUITE_SIZES = [100000, 1000000, 5000000]
+SUITE_DIR = '.covid_bench'
+SUITE_HISTORY = os.path.join(SUITE_DIR, 'history.json')
+
+# A stage is a regression if it is this many times slower than in the last run
+# and takes this many seconds more (shorter stages are mostly noise)
+REGRESSION_RATIO = 1.25
+REGRESSION_SECONDS = 0.05
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def timed(func, *args, repeat = 3, **kwargs):
+    '''
+    Output:
+        Returns a tuple with the best time in seconds of 'repeat' calls to
+        func(*args, **kwargs) and the value returned by the last call.
+    '''
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return (best, value)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def print_times(title, times):
+    '''
+    Action: Prints a table with the times in the list of (name, seconds) tuples
+            and the speedup of each one against the first.
+    '''
+    print(title)
+    base = times[0][1]
+    for name, seconds in times:
+        print('    {:<40} {:>10.4f} s {:>8.1f}x'.format(name, seconds, base / seconds if seconds else float('inf')))
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def bench_store(address = FILE):
+    '''
+    Action: Compares parsing the csv file against reading its columnar store.
+    '''
+    cache_dir = tempfile.mkdtemp()
+    try:
+        (t_csv, (data, _, _)) = timed(read_csv_data, address)
+        (t_cold, _) = timed(load_data, address, cache_dir, repeat = 1)
+        (t_warm, (stored, _, _)) = timed(load_data, address, cache_dir)
+    finally:
+        shutil.rmtree(cache_dir)
+
+    assert data.equals(stored), 'The store returns different data than the csv file'
+
+    print_times('Loading {} ({} rows)'.format(address, len(data)),
+                [('csv (read_csv_data)', t_csv),
+                 ('csv + writing store (first start)', t_cold),
+                 ('memory-mapped store (later starts)', t_warm)])
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def legacy_get_summary(info, key_list, dpto_info = True):
+    '''
+    Per region loop used by get_summary before it was vectorized, kept as
+    the reference for its output and timing.
+    '''
+    info = info.reset_index()
+    info = info.drop(columns=info.columns[0])
+
+    if dpto_info:
+        info = info.set_index('Nombre departamento')
+        col_name = 'Departamento'
+    else:
+        info = info.set_index('Nombre municipio')
+        col_name = 'Municipio'
+
+    info_dict = {}
+    diag_acum = []
+    recu = []
+    fallecidos = []
+    UCI = []
+
+    for key in key_list:
+
+        nun_fallecidos = 0
+        num_UCI = 0
+        num_recuperados = 0
+        casos_diag = 0
+
+        # Checks that the department/municipality info isn't a pandas series.
+        if not isinstance(info.loc[key], pd.Series):
+
+            # Takes number of accumulated cases.
+            casos_diag = data_report(info.loc[key], 'fecha reporte web', 'Casos', True).max()[0]
+
+            # Take cases based on their case location
+            d = data_report(info.loc[key], 'Ubicación del caso', 'Casos')
+
+            # Extract number of deceased patients
+            if 'Fallecido' in d.index:
+                nun_fallecidos = d.loc['Fallecido'].array[0]
+
+            # Extracts number of patients seen in ICU
+            if 'Hospital UCI' in d.index:
+                num_UCI = d.loc['Hospital UCI'].array[0]
+
+            # Take cases according to the recovered column
+            d = data_report(info.loc[key], 'Recuperado', 'Casos')
+
+            # Extract number of recovered patients
+            if 'Recuperado' in d.index:
+                num_recuperados = d.loc['Recuperado'].array[0]
+
+        # If department/municipality info is a pandas series
+        # it means that there's just one case confirmed.
+        else:
+            casos_diag = 1
+            atencion = info.loc[key].loc['Ubicación del caso']
+
+            # Checks patient care.
+            if atencion == 'Recuperado':
+                num_recuperados = 1
+            elif atencion == 'Fallecido':
+                nun_fallecidos = 1
+            elif atencion == 'Hospital UCI':
+                num_UCI = 1
+
+        diag_acum.append(casos_diag)
+        recu.append(num_recuperados)
+        fallecidos.append(nun_fallecidos)
+        UCI.append(num_UCI)
+
+    info_dict.setdefault(col_name, key_list)
+    info_dict.setdefault('Confirmados', diag_acum)
+    info_dict.setdefault('Recuperados', recu)
+    info_dict.setdefault('Fallecidos', fallecidos)
+    info_dict.setdefault('En UCI', UCI)
+
+    df = pd.DataFrame(data=info_dict)
+    df = df.sort_values(by = 'Confirmados', ascending = False).reset_index()
+    df.pop('index')
+
+    return df
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def bench_summary(address = FILE):
+    '''
+    Action: Compares the vectorized get_summary against the per region loop,
+            for the national (departments) and departmental (municipalities) reports.
+    '''
+    (data, dptos, towns) = load_data(address)
+
+    for (name, key_list, dpto_info) in [('departments', dptos, True), ('municipalities', towns, False)]:
+        (t_loop, expected) = timed(legacy_get_summary, data, key_list, dpto_info, repeat = 1)
+        (t_vect, summary) = timed(get_summary, data, key_list, dpto_info)
+
+        assert summary.equals(expected), 'get_summary output differs from the per region loop'
+
+        print_times('get_summary of {} {} ({} rows)'.format(len(key_list), name, len(data)),
+                    [('per region loop', t_loop), ('vectorized', t_vect)])
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def legacy_patients(report_data, tipo_grafica):
+    '''
+    Sex and age reports made over the case rows, as the dashboard did before
+    the aggregate cube, kept as the reference for its output and timing.
+    '''
+    if tipo_grafica != 'Reportados':
+        report_data = report_data.reset_index().set_index('Recuperado').loc[tipo_grafica[0:len(tipo_grafica)-1]]
+
+    sex_report = data_report(report_data, 'Sexo', 'Número de pacientes').reset_index()
+
+    # Ages in months or days are taken as complete years first, as the cube does
+    age_data = report_data.copy()
+    age_data['Edad'] = age_years(age_data['Edad'], age_data['Unidad de medida de edad']).astype(np.int64)
+    age_data['Edad'] = age_data.loc[:,'Edad'].astype(str)
+    age_data = data_report(age_data, 'Edad', 'Número de pacientes').reset_index()
+
+    bins = pd.IntervalIndex.from_tuples([(0, 10), (10, 20), (20, 30), (30, 40), (40, 50), (50, 60),
+                                         (60, 70), (70, 80), (80, 90), (90, 120)], closed = 'left')
+    names = ["0 - 9", "10 - 19", "20 - 29", "30 - 39", "40 - 49","50 - 59", "60 - 69", "70 - 79", "80 - 89",
+             "Mayor de 89"]
+
+    age_data['Intervalos'] = pd.cut(age_data['Edad'].astype(int), bins)
+    age_data.pop('Edad')
+    age_data = age_data.groupby('Intervalos').sum().reset_index()
+    age_data['Intervalos'] = age_data['Intervalos'].categories = names
+
+    return (sex_report, age_data)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def bench_cube(address = FILE):
+    '''
+    Action: Compares making the reports of every department from the case rows
+            against slicing the aggregate cube.
+    '''
+    (data, dptos, _) = load_data(address)
+    dpto_index = data.set_index('Nombre departamento')
+
+    def from_rows():
+        reports = []
+        for dpto in dptos:
+            report_data = dpto_index.loc[[dpto]]
+            key_list = data[data['Nombre departamento'] == dpto]['Nombre municipio'].dropna().unique()
+            reports.append(get_info(report_data, key_list, False) + legacy_patients(report_data, 'Reportados'))
+        return reports
+
+    def from_cube(cube):
+        reports = []
+        for dpto in dptos:
+            report_cube = slice_cube(cube, dpto)
+            key_list = report_cube['Nombre municipio'].dropna().unique()
+            reports.append(cube_info(report_cube, key_list, False) + cube_patients(report_cube))
+        return reports
+
+    (t_build, cube) = timed(build_cube, data, repeat = 1)
+    (t_rows, expected) = timed(from_rows, repeat = 1)
+    (t_cube, reports) = timed(from_cube, cube)
+
+    # Compared by value, categorical and plain columns give the same report
+    for (report, reference) in zip(reports, expected):
+        for (frame, frame_ref) in zip(report, reference):
+            assert frame.reset_index().astype(object).equals(frame_ref.reset_index().astype(object)), \
+                   'The cube reports differ from the case rows reports'
+
+    print('Aggregate cube of {} rows built in {:.4f} s from {} case rows'.format(len(cube), t_build, len(data)))
+    print_times('Reports of {} departments'.format(len(dptos)),
+                [('from case rows', t_rows), ('from aggregate cube', t_cube)])
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def bench_ages(address = FILE):
+    '''
+    Action: Compares the age distribution of every department and 'Recuperado'
+            status made with the string round trip of legacy_patients against
+            the numeric histogram, made for all of them in one call.
+    '''
+    (data, dptos, _) = load_data(address)
+
+    # Ages in months or days go to the first range, the string round trip took them as years
+    assert age_codes([18, 11, 400, 45], [2, 3, 3, 1]).tolist() == [0, 0, 0, 4], 'Ages not normalized by their unit'
+
+    # The string round trip is compared only over the ages given in years
+    years_data = data[data['Unidad de medida de edad'].isin([1]).to_numpy()]
+    groups = years_data.groupby(['Nombre departamento', 'Recuperado'], observed = True).size().index
+
+    def per_group():
+        index = years_data.set_index(['Nombre departamento', 'Recuperado'])
+        histogram = []
+        for group in groups:
+            age_data = index.loc[[group]].reset_index()
+            age_data['Edad'] = age_data.loc[:,'Edad'].astype(str)
+            age_data = data_report(age_data, 'Edad', 'Número de pacientes').reset_index()
+            age_data['Intervalos'] = pd.cut(age_data['Edad'].astype(int), [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 120],
+                                            right = False, labels = AGE_NAMES)
+            histogram.append(age_data.groupby('Intervalos')['Número de pacientes'].sum().tolist())
+        return histogram
+
+    (t_loop, expected) = timed(per_group, repeat = 1)
+    (t_hist, histogram) = timed(age_histogram, years_data, 'Decenal', ['Nombre departamento', 'Recuperado'])
+
+    assert histogram.loc[groups].to_numpy().tolist() == expected, 'The age histogram differs from the string round trip'
+
+    print_times('Age distribution of {} department and status groups ({} rows)'.format(len(groups), len(data)),
+                [('string round trip per group', t_loop), ('numeric histogram', t_hist)])
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def bench_figures(address = FILE, days = 1500):
+    '''
+    Action: Compares making the figures of the national report with every day
+            of the series against downsampling them, against reading their JSON
+            and against the cached figures (what st.plotly_chart does with them
+            on every rerun), and prints the payload size of every chart. The daily
+            cases are repeated up to 'days' days to measure a long timeline.
+    '''
+    folder = tempfile.mkdtemp()
+    try:
+        (_, cube, index) = load_engine(address, folder)
+        report = national_report(cube, index)
+
+        cases = report['cases']
+        values = np.resize(cases[cases.columns[0]].to_numpy(), days)
+        dates = pd.date_range(cases.index.min(), periods = days, freq = 'D', name = cases.index.name)
+        report['cases'] = pd.DataFrame({cases.columns[0]: values}, index = dates)
+
+        # The peak of the series is always kept
+        kept = lttb(np.arange(days), values, MAX_POINTS)
+        assert len(kept) == min(days, MAX_POINTS) and values[kept].max() == values.max(), 'lttb lost the peak of the series'
+
+        make = lambda max_points: make_figures(report, 'Nacional', 'Reportados', max_points)
+        (t_full, full) = timed(lambda: serialize_figures(make(days)))
+        (t_down, payloads) = timed(lambda: serialize_figures(make(MAX_POINTS)))
+        (t_json, _) = timed(lambda: [load_figure(payload) for payload in payloads.values()])
+
+        figures = make(MAX_POINTS)
+        (t_cached, _) = timed(lambda: [figure.to_dict() for figure in figures.values()])
+
+        print_times('Figures of the national report ({} days)'.format(days),
+                    [('every day', t_full), ('downsampled to {} points'.format(MAX_POINTS), t_down),
+                     ('read from cached JSON', t_json), ('cached figures', t_cached)])
+
+        full_sizes = payload_sizes(full)
+        print('Payload of every chart (KB)')
+        print('    {:<8} {:>12} {:>12} {:>12} {:>12}'.format('chart', 'JSON', 'gzip', 'JSON down', 'gzip down'))
+        for (name, (plain, packed)) in payload_sizes(payloads).items():
+            print('    {:<8} {:>12.1f} {:>12.1f} {:>12.1f} {:>12.1f}'.format(name, full_sizes[name][0] / 1024,
+                  full_sizes[name][1] / 1024, plain / 1024, packed / 1024))
+    finally:
+        shutil.rmtree(folder)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def bench_window(address = FILE, days = 14):
+    '''
+    Action: Compares the cases per day of the last 'days' days of every
+            department, filtering the case rows by date and region, against
+            the prefix sums of build_daily_counts.
+    '''
+    folder = tempfile.mkdtemp()
+    try:
+        (data, dptos, _) = load_data(address, folder)
+        cube = load_store_cube(open_store(address, folder))
+
+        end = data['fecha reporte web'].max()
+        start = end - pd.Timedelta(days = days - 1)
+
+        def with_rows():
+            reports = []
+            in_range = data[(data['fecha reporte web'] >= start).to_numpy() & (data['fecha reporte web'] <= end).to_numpy()]
+            for dpto in dptos:
+                rows = in_range[(in_range['Nombre departamento'] == dpto).to_numpy()]
+                reports.append(rows.groupby('fecha reporte web').size())
+            return reports
+
+        def with_prefix(daily):
+            return [window_report(daily, start, end, dpto) for dpto in dptos]
+
+        (t_build, daily) = timed(build_daily_counts, cube, repeat = 1)
+        (t_rows, expected) = timed(with_rows)
+        (t_prefix, reports) = timed(with_prefix, daily)
+
+        for (report, counts) in zip(reports, expected):
+            counts = counts.reindex(report.index, fill_value = 0)
+            assert (report['Casos diagnosticados'].to_numpy() == counts.to_numpy()).all(), 'Different cases in the period'
+
+        regions = window_regions(daily, start, end)
+        assert regions['Casos en el periodo'].sum() == sum(counts.sum() for counts in expected), 'Different cases by department'
+
+        print('Prefix sums of {} days and {} regions built in {:.4f} s'.format(len(daily['dates']), len(daily['rows']), t_build))
+        print_times('Cases of the last {} days of {} departments ({} rows)'.format(days, len(dptos), len(data)),
+                    [('filtering case rows', t_rows), ('prefix sums', t_prefix)])
+    finally:
+        shutil.rmtree(folder)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def legacy_clean_data(data):
+    '''
+    clean_data as it was before NORMALIZE_RULES, with a DataFrame.replace call
+    per rule, kept as the reference for its output and timing.
+
+    Input:
+        data -> DataFrame from pandas with the columns in READ_COL
+
+    Output:
+        Returns the cleaned DataFrame
+    '''
+    # Replace in 'Sex' the values filled with 'f' and 'm' by 'F' and 'M'
+    data = data.replace({'Sexo': {'f': 'F', 'm': 'M'}})
+
+    # Replace in 'Sex' the values filled with 'F' and 'M' by 'Femenino' and 'Masculino'
+    data = data.replace({'Sexo': {'F': 'Femenino', 'M': 'Masculino'}})
+
+    # Some special districts are changed to its respective department
+    data = data.replace({'Nombre departamento': {'BARRANQUILLA': 'ATLANTICO',
+                                                      'CARTAGENA': 'BOLIVAR',
+                                                      'Buenaventura D.E.': 'VALLE',
+                                                      'STA MARTA D.E.': 'MAGDALENA'}})
+
+    # Replace nan values with 'Fallecido NO COVID' in the 'Ubicación del caso' column
+    data['Ubicación del caso'] = data['Ubicación del caso'].fillna('Fallecido NO COVID')
+
+    # Replace nan values with 'N/A' in the 'Estado' column
+    data['Estado'] = data['Estado'].fillna('N/A')
+
+    # Date in format 'dd/mm/yyyy' is changed to 'yyyy-mm-dd' format in all date columns,
+    # the format is inferred only if some date doesn't have the usual one
+    for col in DATE_COL:
+        try:
+            data[col] = pd.to_datetime(data[col], format=DATE_FORMAT)
+        except (ValueError, TypeError):
+            data[col] = pd.to_datetime(data[col], infer_datetime_format=True, dayfirst=True)
+
+    # Changes all cases of same field written different in some columns
+    data = data.replace({'Ubicación del caso': {'casa': 'Casa', 'CASA': 'Casa'}})
+    data = data.replace({'Estado': {'moderado': 'Moderado', 'LEVE': 'Leve', 'leve': 'Leve'}})
+    data = data.replace({'Recuperado': {'fallecido': 'Fallecido'}})
+
+    #A different way to capitalize fields in a column is using 's.str.capitalize()'
+    #method, where 's' is a pandas serie.
+
+    return data
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def bench_clean(address = FILE):
+    '''
+    Action: Compares clean_data against the chained replace calls it had
+            before (legacy_clean_data), both followed by compact_data.
+    '''
+    raw = read_raw_csv(address)
+    raw = raw.assign(**{col: pd.to_numeric(raw[col]) for col in INTEGER_COL})
+
+    (t_legacy, expected) = timed(lambda: compact_data(legacy_clean_data(raw)))
+    (t_rules, data) = timed(lambda: compact_data(clean_data(raw)))
+
+    assert data.equals(expected), 'clean_data output differs from the chained replace calls'
+
+    print_times('Cleaning of {} rows'.format(len(raw)),
+                [('chained replace calls', t_legacy), ('normalization rules', t_rules)])
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def bench_memory(address = FILE):
+    '''
+    Action: Prints the memory used by every column of the cleaned DataFrame,
+            with plain object/int64 columns and with the compact schema.
+    '''
+    before = clean_data(pd.read_csv(address, usecols = READ_COL, low_memory = False))
+    before = before.astype({col: object for col in CATEGORY_COL if col in before})
+    after = compact_data(before.copy())
+
+    mem_before = before.memory_usage(index = False, deep = True)
+    mem_after = after.memory_usage(index = False, deep = True)
+
+    print('Memory by column of {} ({} rows)'.format(address, len(before)))
+    print('    {:<25} {:>10} {:>15} {:>10} {:>15} {:>8}'.format('Column', 'Before', 'dtype', 'After', 'dtype', 'Ratio'))
+    for col in before.columns:
+        print('    {:<25} {:>10} {:>15} {:>10} {:>15} {:>7.1f}x'.format(col, mem_before[col], str(before[col].dtype),
+                                                                         mem_after[col], str(after[col].dtype),
+                                                                         mem_before[col] / max(mem_after[col], 1)))
+    print('    {:<25} {:>10} {:>15} {:>10} {:>15} {:>7.1f}x'.format('Total', mem_before.sum(), '', mem_after.sum(), '',
+                                                                     mem_before.sum() / max(mem_after.sum(), 1)))
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def check_cube_regions(data, cube):
+    '''
+    Action: Checks that the regions listed from the index of the cube (as the
+            filters of the dashboard do) are the ones of the case rows, in order
+            of appearance.
+    '''
+    index = build_region_index(cube)
+    dptos = data['Nombre departamento'].dropna().unique()
+
+    assert list(index['dptos']) == list(dptos), 'Different departments listed from the cube'
+    for dpto in dptos:
+        munis = data[data['Nombre departamento'] == dpto]['Nombre municipio'].dropna().unique()
+        assert index['dpto_munis'][dpto].tolist() == list(munis), 'Different municipalities listed from the cube for ' + dpto
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def bench_regions(address = FILE):
+    '''
+    Action: Compares taking the rows and municipalities of every department and
+            municipality with set_index (as the dashboard did on every rerun)
+            against the region index.
+    '''
+    (data, dptos, _) = load_data(address)
+
+    def with_set_index():
+        regions = []
+        for dpto in dptos:
+            dpto_info = data.set_index('Nombre departamento')
+            munis = np.asarray(data[data['Nombre departamento'] == dpto]['Nombre municipio'].dropna().unique())
+            regions.append((dpto_info.loc[[dpto]], munis))
+
+            muni_info = data.set_index(['Nombre departamento', 'Nombre municipio'])
+            for muni in munis:
+                regions.append((muni_info.loc[[(dpto, muni)]], None))
+        return regions
+
+    def with_index(index):
+        regions = []
+        for dpto in dptos:
+            munis = index['dpto_munis'][dpto]
+            regions.append((region_rows(data, index, dpto), munis))
+
+            for muni in munis:
+                regions.append((region_rows(data, index, dpto, muni), None))
+        return regions
+
+    (t_build, index) = timed(build_region_index, data, repeat = 1)
+    (t_set, expected) = timed(with_set_index, repeat = 1)
+    (t_index, regions) = timed(with_index, index)
+
+    for ((rows, munis), (rows_ref, munis_ref)) in zip(regions, expected):
+        assert rows['ID de caso'].tolist() == rows_ref['ID de caso'].tolist(), 'Different rows taken for a region'
+        assert munis is None or munis.tolist() == munis_ref.tolist(), 'Different municipalities listed for a department'
+
+    # The dashboard lists the regions from the index of the cube
+    check_cube_regions(data, load_store_cube(open_store(address)))
+
+    print('Region index built in {:.4f} s from {} case rows'.format(t_build, len(data)))
+    print_times('Selection of {} regions'.format(len(regions)),
+                [('set_index on every selection', t_set), ('region index', t_index)])
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def next_day_csv(address, new_address, changed = 0.01, added = 0.01):
+    '''
+    Action: Writes in 'new_address' a copy of the csv file as the next daily export
+            would be: a fraction of the cases ('changed') recovered or deceased and
+            a fraction of new cases ('added') at the end, some of them with dirty values.
+    '''
+    raw = pd.read_csv(address, dtype = str)
+    rng = np.random.default_rng(0)
+
+    rows = rng.choice(len(raw), max(1, int(len(raw) * changed)), replace = False)
+    raw.loc[rows[0::2], 'Recuperado'] = 'fallecido'
+    raw.loc[rows[0::2], 'Ubicación del caso'] = 'Fallecido'
+    raw.loc[rows[0::2], 'Fecha de muerte'] = raw.loc[rows[0::2], 'fecha reporte web']
+    raw.loc[rows[1::2], 'Recuperado'] = 'Recuperado'
+    raw.loc[rows[1::2], 'Fecha de recuperación'] = raw.loc[rows[1::2], 'fecha reporte web']
+
+    new = raw.sample(max(1, int(len(raw) * added)), random_state = 0, replace = True).reset_index(drop = True)
+    new['ID de caso'] = (np.arange(len(new)) + pd.to_numeric(raw['ID de caso']).max() + 1).astype(str)
+    new.loc[0::2, 'Sexo'] = 'f'
+    new.loc[0::3, 'Nombre departamento'] = 'STA MARTA D.E.'
+    new.loc[0::3, 'Nombre municipio'] = 'SANTA MARTA'
+
+    pd.concat([raw, new], ignore_index = True).to_csv(new_address, index = False)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def bench_update(address = FILE):
+    '''
+    Action: Compares writing the store of the next daily export from scratch
+            against updating the store of the current export with the changed rows.
+    '''
+    folder = tempfile.mkdtemp()
+    try:
+        new_address = os.path.join(folder, 'next_day.csv')
+        next_day_csv(address, new_address)
+
+        full_dir = os.path.join(folder, 'full')
+        (t_full, full_path) = timed(open_store, new_address, full_dir, repeat = 1)
+
+        # Store of the current export, then the daily file replaces it
+        update_dir = os.path.join(folder, 'update')
+        shutil.copy(address, new_address + '.old')
+        os.replace(new_address, new_address + '.new')
+        os.replace(new_address + '.old', new_address)
+        open_store(new_address, update_dir)
+        os.replace(new_address + '.new', new_address)
+        (t_update, update_path) = timed(open_store, new_address, update_dir, repeat = 1)
+
+        (data, dptos, towns) = load_store(full_path)
+        (data_upd, dptos_upd, towns_upd) = load_store(update_path)
+        assert data.equals(data_upd), 'The updated store has different rows than the full one'
+        assert dptos.tolist() == dptos_upd.tolist() and towns.tolist() == towns_upd.tolist()
+
+        cube = load_store_cube(full_path)
+        cube_upd = load_store_cube(update_path)
+        assert cube.astype(object).equals(cube_upd.astype(object)), 'The updated store has a different cube than the full one'
+
+        # The regions of the filters are listed from the cube, in the same order
+        check_cube_regions(data, cube)
+        check_cube_regions(data_upd, cube_upd)
+    finally:
+        shutil.rmtree(folder)
+
+    print_times('Store of the next daily export ({} rows)'.format(len(data)),
+                [('whole csv', t_full), ('changed rows only', t_update)])
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def peak_memory(func, *args, **kwargs):
+    '''
+    Output:
+        Returns a tuple with the time in seconds, the peak of memory allocated
+        (in bytes, as traced by tracemalloc) and the value of func(*args, **kwargs).
+    '''
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    (_, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return (elapsed, peak, value)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def bench_chunked(address = FILE):
+    '''
+    Action: Compares the store written by the streaming loader with several chunk
+            sizes (1/20 and 1/4 of the rows) against the one written reading the
+            whole csv file: both must be the same, and the peak memory of each way
+            is printed.
+    '''
+    folder = tempfile.mkdtemp()
+    try:
+        (t_full, peak_full, full_path) = peak_memory(open_store, address, os.path.join(folder, 'full'))
+        (data, dptos, towns) = load_store(full_path)
+        cube = load_store_cube(full_path)
+
+        results = [('whole csv', t_full, peak_full)]
+        for chunk_size in (len(data) // 20 + 1, len(data) // 4 + 1):
+            (t_chunk, peak_chunk, path) = peak_memory(open_store, address, os.path.join(folder, str(chunk_size)), chunk_size)
+
+            (data_chunk, dptos_chunk, towns_chunk) = load_store(path)
+            assert data.equals(data_chunk), 'The streaming loader gives different rows'
+            assert dptos.tolist() == dptos_chunk.tolist() and towns.tolist() == towns_chunk.tolist()
+            assert cube.equals(load_store_cube(path)), 'The streaming loader gives a different cube'
+            assert (load_row_hash(full_path) == load_row_hash(path)).all()
+            assert read_manifest(full_path)['columns'] == read_manifest(path)['columns']
+
+            results.append(('chunks of {} rows'.format(chunk_size), t_chunk, peak_chunk))
+    finally:
+        shutil.rmtree(folder)
+
+    print('Store of {} ({} rows)'.format(address, len(data)))
+    for (name, seconds, peak) in results:
+        print('    {:<40} {:>10.4f} s {:>10.1f} MB peak'.format(name, seconds, peak / 2**20))
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def bench_parallel(address = FILE, workers = (1, 2, 4, 8)):
+    '''
+    Action: Times the parallel parsing of the csv file with several numbers of
+            worker processes, every result must be the same of the serial parsing.
+            The file is split among all of them whatever its size, and then as
+            read_csv_parallel does by default (see PARALLEL_MIN_BYTES).
+    '''
+    (data, dptos, towns) = read_csv_data(address)
+    row_hash = row_hashes(read_raw_csv(address))
+    cube = build_cube(data)
+
+    times = []
+    for n in workers:
+        for min_bytes in (0, PARALLEL_MIN_BYTES):
+            (seconds, (data_par, hash_par, cube_par)) = timed(read_csv_parallel, address, n, min_bytes, repeat = 1)
+
+            assert data.equals(data_par), 'Parallel parsing gives different rows'
+            assert (row_hash == hash_par).all(), 'Parallel parsing gives different row hashes'
+            assert cube.equals(cube_par), 'Parallel parsing gives a different cube'
+
+            times.append(('{} worker(s){}'.format(n, ', by file size' if min_bytes else ''), seconds))
+
+    print_times('Parallel parsing of {} ({} rows, {} CPUs)'.format(address, len(data), os.cpu_count()), times)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def mapped_bytes(values):
+    '''
+    Output:
+        Returns the bytes of the Series that are on a memory map of the store
+        (0 if the values were copied to the memory of the process).
+    '''
+    array = values.array
+    array = array.codes if isinstance(array, pd.Categorical) else np.asarray(array)
+
+    base = array
+    while base is not None and not isinstance(base, np.memmap):
+        base = base.base
+
+    return array.nbytes if base is not None else 0
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def bench_shared(address = FILE):
+    '''
+    Action: Prints which columns of the loaded case table and cube stay on the
+            read-only memory maps of the store (shared by every process that
+            loads it) and which ones were copied to the memory of the process.
+    '''
+    folder = tempfile.mkdtemp()
+    try:
+        path = open_store(address, folder)
+        (data, _, _) = load_store(path)
+        cube = load_store_cube(path)
+
+        for (name, frame) in [('Case table', data), ('Aggregate cube', cube)]:
+            print('{} of {} ({} rows)'.format(name, address, len(frame)))
+            for col in frame.columns:
+                mapped = mapped_bytes(frame[col])
+                print('    {:<25} {:>12} bytes {}'.format(col, frame[col].memory_usage(index = False, deep = True),
+                                                        'shared (memory map)' if mapped else 'private copy'))
+    finally:
+        shutil.rmtree(folder)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def suite_times(address):
+    '''
+    Output:
+        Returns a dictionary with the seconds of every stage of the dashboard
+        over the csv file: load_csv_data parsing the csv and reading the store,
+        get_info, get_summary, cube_info and the age binning.
+    '''
+    folder = tempfile.mkdtemp()
+    try:
+        times = {}
+        (times['load_csv_data (csv)'], _) = timed(load_data, address, folder, repeat = 1)
+        (times['load_csv_data (store)'], (data, dptos, towns)) = timed(load_data, address, folder)
+
+        (times['get_info'], _) = timed(get_info, data, dptos, True)
+        (times['get_summary'], _) = timed(get_summary, data, towns, False)
+
+        cube = load_store_cube(open_store(address, folder))
+        (times['cube_info'], _) = timed(cube_info, cube, dptos, True)
+        (times['age binning'], _) = timed(age_histogram, data, 'Decenal', ['Nombre departamento', 'Recuperado'])
+
+        return times
+    finally:
+        shutil.rmtree(folder)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def bench_suite(sizes = None):
+    '''
+    Action: Times the stages of suite_times over synthetic csv files with the
+            rows in 'sizes' (comma separated, SUITE_SIZES if None), saves the
+            times in SUITE_HISTORY and compares them with the last run saved.
+            The files are written once in SUITE_DIR and reused later.
+
+    Output:
+        Exits with status 1 if some stage is slower (see REGRESSION_RATIO).
+    '''
+    sizes = SUITE_SIZES if sizes is None else [int(rows) for rows in sizes.split(',')]
+    os.makedirs(SUITE_DIR, exist_ok = True)
+
+    history = []
+    if os.path.isfile(SUITE_HISTORY):
+        with open(SUITE_HISTORY, encoding = 'utf-8') as f:
+            history = json.load(f)
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output = True, text = True).stdout.strip()
+    except OSError:
+        commit = ''
+
+    results = {}
+    regressions = []
+    for rows in sizes:
+        address = os.path.join(SUITE_DIR, 'synthetic_{}.csv'.format(rows))
+        if not os.path.isfile(address):
+            print('Writing {} ...'.format(address))
+            write_synthetic_csv(address, rows)
+
+        results[str(rows)] = suite_times(address)
+
+        # Times of the last run with this size
+        previous = next((run['results'][str(rows)] for run in reversed(history) if str(rows) in run['results']), {})
+
+        print('Suite over {} synthetic rows'.format(rows))
+        print('    {:<25} {:>12} {:>12} {:>8}'.format('stage', 'seconds', 'last run', 'ratio'))
+        for (name, seconds) in results[str(rows)].items():
+            last = previous.get(name)
+            ratio = seconds / last if last else None
+            slower = ratio is not None and ratio > REGRESSION_RATIO and seconds - last > REGRESSION_SECONDS
+            if slower:
+                regressions.append('{} ({} rows)'.format(name, rows))
+
+            print('    {:<25} {:>12.4f} {:>12} {:>8} {}'.format(name, seconds, '-' if last is None else '{:.4f}'.format(last),
+                                                               '-' if ratio is None else '{:.2f}x'.format(ratio),
+                                                               'REGRESSION' if slower else ''))
+
+    history.append({'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'commit': commit, 'results': results})
+    with open(SUITE_HISTORY, 'w', encoding = 'utf-8') as f:
+        json.dump(history, f, indent = 1)
+
+    if regressions:
+        print('Regressions: ' + ', '.join(regressions))
+        sys.exit(1)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+BENCHMARKS = {'store': bench_store,
+              'summary': bench_summary,
+              'cube': bench_cube,
+              'ages': bench_ages,
+              'figures': bench_figures,
+              'window': bench_window,
+              'clean': bench_clean,
+              'memory': bench_memory,
+              'regions': bench_regions,
+              'update': bench_update,
+              'chunked': bench_chunked,
+              'parallel': bench_parallel,
+              'shared': bench_shared,
+              'suite': bench_suite}
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print('Usage: python benchmark.py {' + '|'.join(BENCHMARKS) + '} [csv_file]')
+        sys.exit(1)
+
+    BENCHMARKS[sys.argv[1]](*sys.argv[2:3])
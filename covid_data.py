@@ -0,0 +1,1039 @@
+# Loading, cleaning and storage of the COVID-19 positive cases dataset.
+#
+# The csv file is parsed and cleaned just once: the cleaned DataFrame and its
+# aggregate cube are written as a columnar store (one raw binary file per column
+# plus a 'manifest.json') inside CACHE_DIR, in a folder named after a hash of the
+# csv file. Later starts memory-map those files instead of parsing the csv again,
+# and a new version of the csv file only cleans the rows that changed (see update_store).
+#
+# The memory maps are read-only and shared by every process that opens the same
+# store: all the sessions and server processes of the dashboard use a single copy
+# of the data. A folder in shared memory (like /dev/shm) can be used as cache_dir.
+import os, io, json, hashlib, shutil, time, multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from covid_reports import build_cube, update_cube, add_cubes, sort_cube
+
+# Names of the columns to read from the csv file
+READ_COL = ['ID de caso','Fecha de notificación','Nombre municipio','Nombre departamento','Ubicación del caso', 'Recuperado',
+            'Edad','Unidad de medida de edad','Sexo','Estado','Fecha de muerte','Fecha de diagnóstico','Fecha de recuperación', 'fecha reporte web']
+
+# Columns with dates in 'dd/mm/yyyy' format
+DATE_COL = ['fecha reporte web', 'Fecha de muerte', 'Fecha de notificación', 'Fecha de diagnóstico', 'Fecha de recuperación']
+
+# Format of the dates in the csv file
+DATE_FORMAT = '%d/%m/%Y %H:%M:%S'
+
+# Text columns with few different values, kept as pandas categoricals
+CATEGORY_COL = ['Nombre departamento', 'Nombre municipio', 'Ubicación del caso', 'Recuperado', 'Sexo', 'Estado']
+
+# Normalization of the text columns done by clean_data: 'map' changes values written
+# different (or districts to their department), 'fill' is the value of empty fields.
+# Every rule is applied over the unique values of its column (see normalize_column)
+NORMALIZE_RULES = {'Sexo': {'map': {'f': 'Femenino', 'm': 'Masculino', 'F': 'Femenino', 'M': 'Masculino'}},
+                   'Nombre departamento': {'map': {'BARRANQUILLA': 'ATLANTICO',
+                                                   'CARTAGENA': 'BOLIVAR',
+                                                   'Buenaventura D.E.': 'VALLE',
+                                                   'STA MARTA D.E.': 'MAGDALENA'}},
+                   'Ubicación del caso': {'map': {'casa': 'Casa', 'CASA': 'Casa'}, 'fill': 'Fallecido NO COVID'},
+                   'Estado': {'map': {'moderado': 'Moderado', 'LEVE': 'Leve', 'leve': 'Leve'}, 'fill': 'N/A'},
+                   'Recuperado': {'map': {'fallecido': 'Fallecido'}}}
+
+# Integer columns stored with the smallest width that fits their values
+INTEGER_COL = ['ID de caso', 'Edad', 'Unidad de medida de edad']
+
+# Folder (next to the csv file) where the columnar stores are saved
+CACHE_DIR = '.covid_cache'
+
+# Rows read at once by the streaming loader (see stream_store)
+CHUNK_SIZE = 500000
+
+# Bytes of the csv file parsed by every worker at least, smaller files use fewer workers
+# (or none): starting a worker process costs more than parsing a few MB
+PARALLEL_MIN_BYTES = 32 * 2**20
+
+# Changes every time the layout of the store changes, so old stores are ignored
+STORE_VERSION = 6
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def normalize_column(values, rule):
+    '''
+    Inputs:
+        values -> Series with the values of a text column
+
+        rule   -> Dictionary with the 'map' of values to change and the 'fill'
+                  value of empty fields (both optional, see NORMALIZE_RULES)
+
+    Output:
+        Returns a Categorical with the normalized values, whose categories are
+        sorted (as astype('category') would sort them). The rule is applied
+        once to every different value and the rows just take its code.
+    '''
+    (codes, uniques) = pd.factorize(values)
+    mapping = rule.get('map', {})
+    fill = rule.get('fill')
+
+    normalized = [mapping.get(value, value) for value in uniques]
+    if fill is not None and (codes < 0).any():
+        normalized.append(fill)
+        codes = np.where(codes < 0, len(normalized) - 1, codes)
+
+    # Different values can be normalized to the same one, the categories are taken once
+    (positions, categories) = pd.factorize(np.array(normalized, dtype = object), sort = True)
+    positions = np.append(positions, -1)
+
+    return pd.Categorical.from_codes(positions[codes], categories = categories)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def clean_data(data):
+    '''
+    Action: Organizes the raw information read from the csv dataset
+
+    Input:
+        data -> DataFrame from pandas with the columns in READ_COL
+
+    Output:
+        Returns the cleaned DataFrame
+    '''
+    # Columns are changed in a shallow copy, the DataFrame received is left as it is
+    data = data.copy(deep = False)
+
+    # Changes all cases of same field written different, special districts to its
+    # respective department and empty fields (see NORMALIZE_RULES)
+    for (col, rule) in NORMALIZE_RULES.items():
+        data[col] = normalize_column(data[col], rule)
+
+    # Date in format 'dd/mm/yyyy' is changed to 'yyyy-mm-dd' format in all date columns,
+    # the format is inferred only if some date doesn't have the usual one
+    for col in DATE_COL:
+        try:
+            data[col] = pd.to_datetime(data[col], format=DATE_FORMAT)
+        except (ValueError, TypeError):
+            data[col] = pd.to_datetime(data[col], infer_datetime_format=True, dayfirst=True)
+
+    #A different way to capitalize fields in a column is using 's.str.capitalize()'
+    #method, where 's' is a pandas serie.
+
+    return data
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def compact_data(data):
+    '''
+    Action: Changes the cleaned DataFrame to a memory-compact schema:
+            categoricals for the columns in CATEGORY_COL and the smallest
+            integer width for the columns in INTEGER_COL (dates are already
+            datetime64).
+
+    Output:
+        Returns the compact DataFrame
+    '''
+    for col in CATEGORY_COL:
+        data[col] = data[col].astype('category')
+
+    # Columns with empty values are read as float and left as they are
+    for col in INTEGER_COL:
+        if pd.api.types.is_integer_dtype(data[col]):
+            data[col] = pd.to_numeric(data[col], downcast = 'integer')
+
+    return data
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def region_lists(data):
+    '''
+    Output:
+        Returns a tuple with two ndarrays: all departments and all municipalities
+        with COVID cases reported, in order of appearance.
+    '''
+    dptos = np.asarray(data['Nombre departamento'].dropna().unique())
+    towns = np.asarray(data['Nombre municipio'].dropna().unique())
+
+    return (dptos, towns)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def region_munis(data):
+    '''
+    Output:
+        Returns a dictionary {department: list} with the municipalities of every
+        department, in order of appearance (a name can be in several departments).
+    '''
+    pairs = data[['Nombre departamento', 'Nombre municipio']].dropna().drop_duplicates()
+
+    dpto_munis = {}
+    for (dpto, muni) in zip(pairs['Nombre departamento'].tolist(), pairs['Nombre municipio'].tolist()):
+        dpto_munis.setdefault(dpto, []).append(muni)
+
+    return dpto_munis
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def read_raw_csv(address):
+    '''
+    Output:
+        Returns a DataFrame with the columns in READ_COL of the csv file, all of
+        them read as text (see prepare_data).
+    '''
+    return pd.read_csv(address, usecols = READ_COL, dtype = str)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def prepare_data(raw):
+    '''
+    Action: Converts the columns in INTEGER_COL of the rows read by read_raw_csv
+            to numbers, then cleans and compacts the rows.
+
+    Output:
+        Returns the cleaned and compact DataFrame
+    '''
+    raw = raw.assign(**{col: pd.to_numeric(raw[col]) for col in INTEGER_COL})
+
+    return compact_data(clean_data(raw))
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def row_hashes(raw):
+    '''
+    Output:
+        Returns an uint64 ndarray with a hash of every row read by read_raw_csv,
+        used to find the rows that change between two versions of the csv file.
+    '''
+    return pd.util.hash_pandas_object(raw, index = False).to_numpy()
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def read_csv_data(address, workers = 1):
+    '''
+    Action: Parses and cleans the csv dataset, without using any store.
+            With more than one worker the file is parsed in parallel
+            (see read_csv_parallel).
+
+    Output
+    Returns a tuple with three items:
+        1. DataFrame from pandas wich contains COVID information.
+        2. ndarray with all Colombia departments.
+        3. ndarray with all Colombia municipalities.
+    '''
+    #Reads the csv file and converts it to a DataFrame
+    if workers > 1:
+        (data, _, _) = read_csv_parallel(address, workers)
+    else:
+        data = prepare_data(read_raw_csv(address))
+    (dptos, towns) = region_lists(data)
+
+    return (data, dptos, towns)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def concat_data(frames):
+    '''
+    Action: Joins DataFrames cleaned by prepare_data (in the given order).
+
+    Output:
+        Returns the DataFrame that prepare_data gives for all their rows together:
+        categoricals with the sorted union of the categories found and the smallest
+        integer width for the columns in INTEGER_COL.
+    '''
+    frames = [frame.copy() for frame in frames]
+
+    # Categoricals are joined with the (sorted) union of their categories
+    for col in CATEGORY_COL:
+        categories = frames[0][col].cat.categories
+        for frame in frames[1:]:
+            categories = categories.union(frame[col].cat.categories)
+
+        for frame in frames:
+            frame[col] = frame[col].cat.set_categories(categories)
+
+    data = pd.concat(frames, ignore_index = True)
+
+    for col in CATEGORY_COL:
+        data[col] = data[col].cat.remove_unused_categories()
+
+    # The smallest width may have changed with the new values, and columns read as float
+    # because some rows were empty are integer again if those rows are gone
+    for col in INTEGER_COL:
+        values = data[col]
+        if pd.api.types.is_float_dtype(values) and values.notna().all() and (values == np.floor(values)).all():
+            data[col] = values.astype(np.int64)
+
+        if pd.api.types.is_integer_dtype(data[col]):
+            data[col] = pd.to_numeric(data[col], downcast = 'integer')
+
+    return data
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def merge_rows(kept, added, unchanged):
+    '''
+    Action: Joins the stored rows that didn't change with the new or changed
+            rows, in the order of the new csv file.
+
+    Inputs:
+        kept      -> DataFrame with the stored rows that didn't change
+
+        added     -> DataFrame with the new or changed rows, cleaned
+
+        unchanged -> Boolean ndarray, True for every row of the new csv file
+                     that is in 'kept', False for the ones in 'added'
+
+    Output:
+        Returns the DataFrame that prepare_data gives for the whole new csv file.
+    '''
+    data = concat_data([kept, added])
+
+    # Back to the order of the csv file
+    position = np.concatenate([np.flatnonzero(unchanged), np.flatnonzero(~unchanged)])
+
+    return data.take(np.argsort(position, kind = 'stable')).reset_index(drop = True)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def split_csv(address, parts):
+    '''
+    Action: Splits the csv file in 'parts' byte ranges of about the same size,
+            every range starts at the beginning of a row. Fields with line
+            breaks inside quotes are not supported (the dataset has none).
+
+    Output:
+        Returns a tuple with the header line (bytes) and the list of
+        (start, end) byte ranges.
+    '''
+    size = os.path.getsize(address)
+
+    with open(address, 'rb') as f:
+        header = f.readline()
+        bounds = [f.tell()]
+
+        for i in range(1, parts):
+            # The row where the range would end is left in the previous range
+            f.seek(bounds[0] + (size - bounds[0]) * i // parts)
+            f.readline()
+
+            if bounds[-1] < f.tell() < size:
+                bounds.append(f.tell())
+
+    bounds.append(size)
+
+    return (header, [(start, end) for (start, end) in zip(bounds[:-1], bounds[1:]) if start < end])
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def read_csv_range(address, header, start, end):
+    '''
+    Action: Parses and cleans the rows in a byte range of the csv file
+            (see split_csv), it runs in the processes of read_csv_parallel.
+
+    Output:
+        Returns a tuple with the cleaned DataFrame, the hashes of its rows
+        (see row_hashes) and its aggregate cube.
+    '''
+    with open(address, 'rb') as f:
+        f.seek(start)
+        body = f.read(end - start)
+
+    raw = pd.read_csv(io.BytesIO(header + body), usecols = READ_COL, dtype = str)
+    data = prepare_data(raw)
+
+    return (data, row_hashes(raw), build_cube(data))
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def read_csv_parallel(address, workers, min_bytes = PARALLEL_MIN_BYTES):
+    '''
+    Action: Parses and cleans the csv file in up to 'workers' processes, each one
+            with a byte range of the file (see split_csv) of 'min_bytes' at least.
+            Files smaller than twice 'min_bytes' are parsed in this process.
+
+    Output:
+        Returns a tuple with the cleaned DataFrame (the same one read_csv_data
+        gives), the hashes of its rows and its aggregate cube.
+    '''
+    if min_bytes:
+        workers = min(workers, max(1, os.path.getsize(address) // min_bytes))
+
+    (header, ranges) = split_csv(address, workers)
+
+    # Nothing to split
+    if len(ranges) < 2:
+        raw = read_raw_csv(address)
+        data = prepare_data(raw)
+        return (data, row_hashes(raw), build_cube(data))
+
+    # The processes are spawned, forking the threads of the Streamlit server (or of the
+    # refresher) could leave a lock held in the new processes
+    with ProcessPoolExecutor(max_workers = workers, mp_context = multiprocessing.get_context('spawn')) as pool:
+        parts = list(pool.map(read_csv_range, *zip(*[(address, header, start, end) for (start, end) in ranges])))
+
+    data = concat_data([part[0] for part in parts])
+    row_hash = np.concatenate([part[1] for part in parts])
+    cube = add_cubes([part[2] for part in parts])
+
+    return (data, row_hash, cube)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def update_data(data, row_hash, raw):
+    '''
+    Action: Compares the rows of a new version of the csv file against the stored
+            ones by 'ID de caso' and the hash of the row, only the new or changed
+            rows are cleaned.
+
+    Inputs:
+        data     -> Stored DataFrame (cleaned and compact)
+
+        row_hash -> ndarray with the hashes (see row_hashes) of the stored rows
+
+        raw      -> DataFrame read by read_raw_csv from the new csv file
+
+    Output:
+        Returns None if the rows can't be matched by 'ID de caso' (repeated ids),
+        otherwise a tuple with four items:
+            1. DataFrame with all the rows of the new csv file.
+            2. ndarray with the hashes of those rows.
+            3. DataFrame with the stored rows that changed or are gone.
+            4. DataFrame with the new or changed rows.
+    '''
+    new_hash = row_hashes(raw)
+
+    # astype is much faster than pd.to_numeric, which is only needed for empty or odd ids
+    try:
+        new_ids = pd.Index(raw['ID de caso'].astype(np.int64))
+    except (ValueError, TypeError):
+        new_ids = pd.Index(pd.to_numeric(raw['ID de caso']))
+    old_ids = pd.Index(data['ID de caso'])
+
+    if not (new_ids.is_unique and old_ids.is_unique):
+        return None
+
+    # Position of every new row in the stored rows (-1 for new cases)
+    old_pos = old_ids.get_indexer(new_ids)
+    found = old_pos >= 0
+
+    unchanged = np.zeros(len(raw), dtype = bool)
+    unchanged[found] = np.asarray(row_hash)[old_pos[found]] == new_hash[found]
+
+    kept_pos = old_pos[unchanged]
+    removed_mask = np.ones(len(data), dtype = bool)
+    removed_mask[kept_pos] = False
+
+    removed = data[removed_mask]
+    added = prepare_data(raw[~unchanged])
+    data = merge_rows(data.take(kept_pos), added, unchanged)
+
+    return (data, new_hash, removed, added)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def file_hash(address, block = 1 << 20):
+    '''
+    Output:
+        Returns the hexadecimal sha1 digest of the file content (plus the store
+        version), used as the name of the store of that file.
+    '''
+    sha = hashlib.sha1(str(STORE_VERSION).encode())
+
+    with open(address, 'rb') as f:
+        for chunk in iter(lambda: f.read(block), b''):
+            sha.update(chunk)
+
+    return sha.hexdigest()
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def cache_folder(address, cache_dir = None):
+    '''
+    Output:
+        Returns the folder where the stores of the csv file in 'address' are saved.
+    '''
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(address)), CACHE_DIR)
+
+    return cache_dir
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def store_path(address, cache_dir = None):
+    '''
+    Output:
+        Returns the folder where the store of the csv file in 'address' is saved.
+    '''
+    return os.path.join(cache_folder(address, cache_dir), file_hash(address))
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def save_columns(frame, path):
+    '''
+    Action: Writes every column of the DataFrame in a raw binary file in 'path':
+        - numeric and date columns with their own dtype.
+        - categorical columns as their codes, the categories are saved in the manifest.
+        - other text columns as int32 codes, their values are saved in the manifest.
+
+    Output:
+        Returns the list with the manifest entry of every column.
+    '''
+    os.makedirs(path, exist_ok = True)
+
+    columns = []
+    for i, col in enumerate(frame.columns):
+        values = frame[col]
+        entry = {'name': col, 'file': str(i) + '.bin'}
+
+        if pd.api.types.is_datetime64_dtype(values) or pd.api.types.is_numeric_dtype(values):
+            array = values.to_numpy()
+            entry['kind'] = 'array'
+        elif pd.api.types.is_categorical_dtype(values):
+            array = values.cat.codes.to_numpy()
+            entry['kind'] = 'category'
+            entry['categories'] = values.cat.categories.tolist()
+            entry['ordered'] = bool(values.cat.ordered)
+        else:
+            # Text is saved as the position of each value in 'categories' (-1 for nan)
+            (array, categories) = pd.factorize(values)
+            array = array.astype(np.int32)
+            entry['kind'] = 'text'
+            entry['categories'] = categories.tolist()
+
+        entry['dtype'] = array.dtype.str
+        array.tofile(os.path.join(path, entry['file']))
+        columns.append(entry)
+
+    return columns
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def map_array(path, file, dtype, rows):
+    '''
+    Output:
+        Returns the read-only memory map of a raw binary file of the store.
+    '''
+    dtype = np.dtype(dtype)
+
+    # np.memmap can not map empty files
+    if rows == 0:
+        return np.empty(0, dtype = dtype)
+
+    return np.memmap(os.path.join(path, file), dtype = dtype, mode = 'r', shape = (rows,))
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def load_columns(path, columns, rows):
+    '''
+    Action: Reads the columns written by save_columns, the binary files are memory-mapped
+            read-only, so all the processes that load the same store share the same
+            memory (the pages of the files in the OS cache) and nobody can change it.
+
+    Output:
+        Returns the DataFrame
+    '''
+    frame = {}
+    for entry in columns:
+        array = map_array(path, entry['file'], entry['dtype'], rows)
+
+        if entry['kind'] == 'category':
+            dtype = pd.CategoricalDtype(entry['categories'], ordered = entry.get('ordered', False))
+            array = pd.Categorical.from_codes(array, dtype = dtype)
+        elif entry['kind'] == 'text':
+            array = pd.Categorical.from_codes(array, entry['categories']).astype(object)
+
+        frame[entry['name']] = array
+
+    # copy = False keeps every column on its read-only memory map (pandas >= 1.3, as pinned
+    # in requirements.txt, doesn't join columns of the same dtype in a new array when it
+    # isn't copying, older versions do and the data would be copied to every process)
+    return pd.DataFrame(frame, columns = [entry['name'] for entry in columns], copy = False)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def save_store(path, data, dptos, towns, cube, row_hash, source):
+    '''
+    Action: Writes the cleaned DataFrame, its aggregate cube (see build_cube) and
+            the hashes of its csv rows as a columnar store in the 'path' folder.
+
+    The store is written in a temporary folder and renamed at the end, so a
+    half written store is never read.
+    '''
+    tmp_path = path + '.tmp-' + str(os.getpid())
+    os.makedirs(tmp_path, exist_ok = True)
+
+    np.asarray(row_hash, dtype = np.uint64).tofile(os.path.join(tmp_path, 'row_hash.bin'))
+
+    publish_store(tmp_path, path, source, len(data), save_columns(data, tmp_path), cube, dptos, towns, region_munis(data))
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def publish_store(tmp_path, path, source, rows, columns, cube, dptos, towns, dpto_munis):
+    '''
+    Action: Writes the cube (sorted by sort_cube) and the manifest of a store
+            whose columns and row hashes are already in 'tmp_path', then renames
+            it to 'path'. 'dpto_munis' has the municipalities of every department
+            in order of appearance (see region_munis).
+    '''
+    cube = sort_cube(cube, dptos, dpto_munis)
+
+    manifest = {'version': STORE_VERSION,
+                'source': os.path.abspath(source),
+                'created': time.time(),
+                'rows': rows,
+                'columns': columns,
+                'row_hash': 'row_hash.bin',
+                'cube': {'rows': len(cube),
+                         'columns': save_columns(cube, os.path.join(tmp_path, 'cube'))},
+                'dptos': list(dptos),
+                'towns': list(towns),
+                'dpto_munis': dpto_munis}
+
+    with open(os.path.join(tmp_path, 'manifest.json'), 'w', encoding = 'utf-8') as f:
+        json.dump(manifest, f, ensure_ascii = False)
+
+    # Other process could have written the same store meanwhile
+    if os.path.isdir(path):
+        shutil.rmtree(tmp_path)
+    else:
+        os.replace(tmp_path, path)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def read_manifest(path):
+    '''
+    Output:
+        Returns the manifest of the store in 'path' as a dictionary.
+    '''
+    with open(os.path.join(path, 'manifest.json'), encoding = 'utf-8') as f:
+        return json.load(f)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def load_store(path):
+    '''
+    Action: Reads the case rows of a store written by save_store.
+
+    Output:
+        Same tuple returned by read_csv_data.
+    '''
+    manifest = read_manifest(path)
+
+    data = load_columns(path, manifest['columns'], manifest['rows'])
+    dptos = np.array(manifest['dptos'], dtype = object)
+    towns = np.array(manifest['towns'], dtype = object)
+
+    return (data, dptos, towns)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def load_store_cube(path):
+    '''
+    Output:
+        Returns the aggregate cube saved in the store (see build_cube).
+    '''
+    cube = read_manifest(path)['cube']
+
+    return load_columns(os.path.join(path, 'cube'), cube['columns'], cube['rows'])
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def load_row_hash(path):
+    '''
+    Output:
+        Returns the hashes of the csv rows saved in the store (see row_hashes).
+    '''
+    manifest = read_manifest(path)
+
+    return map_array(path, manifest['row_hash'], np.uint64, manifest['rows'])
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def build_store(address, path, workers = 1):
+    '''
+    Action: Parses and cleans the whole csv file and writes its store,
+            in parallel with more than one worker (see read_csv_parallel).
+    '''
+    if workers > 1:
+        (data, row_hash, cube) = read_csv_parallel(address, workers)
+    else:
+        raw = read_raw_csv(address)
+        data = prepare_data(raw)
+        (row_hash, cube) = (row_hashes(raw), build_cube(data))
+
+    (dptos, towns) = region_lists(data)
+
+    save_store(path, data, dptos, towns, cube, row_hash, address)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def codes_dtype(n_categories):
+    '''
+    Output:
+        Returns the integer dtype pandas uses for the codes of a categorical
+        with 'n_categories' categories.
+    '''
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+
+    return np.dtype(np.int64)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def smallest_integer(low, high):
+    '''
+    Output:
+        Returns the smallest integer dtype holding values from 'low' to 'high',
+        as pd.to_numeric(..., downcast = 'integer') does.
+    '''
+    for dtype in (np.int8, np.int16, np.int32):
+        if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+
+    return np.dtype(np.int64)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def append_column(column, values, path):
+    '''
+    Action: Appends the values of a cleaned chunk to the binary file of the column.
+
+    Inputs:
+        column -> Dictionary with the state of the column in the streaming loader
+                  (see stream_store)
+
+        values -> Series with the values of the chunk
+
+        path   -> Folder of the store
+    '''
+    name = column['name']
+
+    if pd.api.types.is_categorical_dtype(values):
+        # Categories are numbered in order of appearance over all the chunks
+        for value in pd.unique(values.dropna()).tolist():
+            if value not in column['positions']:
+                column['positions'][value] = len(column['categories'])
+                column['categories'].append(value)
+
+        mapping = np.array([column['positions'][value] for value in values.cat.categories] + [-1], dtype = np.int32)
+        array = mapping[values.cat.codes.to_numpy()]
+
+    elif name in INTEGER_COL:
+        # Saved as float until the end, when it is known if there are empty values
+        array = values.to_numpy(dtype = np.float64)
+        found = array[~np.isnan(array)]
+        column['empty'] |= len(found) < len(array)
+        if len(found):
+            column['low'] = min(column['low'], found.min())
+            column['high'] = max(column['high'], found.max())
+
+    else:
+        array = values.to_numpy()
+        column['dtype'] = array.dtype
+
+    with open(os.path.join(path, column['file']), 'ab') as f:
+        array.tofile(f)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def finish_column(column, path, rows, chunk_size):
+    '''
+    Action: Rewrites the binary file of a column loaded by the streaming loader
+            with the dtype and codes the whole DataFrame would have (sorted
+            categories, smallest integer width), 'chunk_size' values at a time.
+
+    Output:
+        Returns the manifest entry of the column (see save_columns).
+    '''
+    entry = {'name': column['name'], 'file': column['file']}
+    source = os.path.join(path, column['file'])
+
+    if column['kind'] == 'category':
+        categories = pd.Index(column['categories'], dtype = object)
+        order = categories.argsort()
+
+        # Position of every category once they are sorted (-1 stays for empty values)
+        rank = np.empty(len(order) + 1, dtype = np.int64)
+        rank[order] = np.arange(len(order))
+        rank[-1] = -1
+
+        (old_dtype, new_dtype) = (np.int32, codes_dtype(len(order)))
+        convert = lambda block: rank[block].astype(new_dtype)
+
+        entry['kind'] = 'category'
+        entry['categories'] = categories[order].tolist()
+        entry['ordered'] = False
+    elif column['kind'] == 'integer':
+        old_dtype = np.float64
+        new_dtype = np.dtype(np.float64) if column['empty'] or rows == 0 else smallest_integer(column['low'], column['high'])
+        convert = lambda block: block.astype(new_dtype)
+
+        entry['kind'] = 'array'
+    else:
+        entry['kind'] = 'array'
+        entry['dtype'] = np.dtype(column['dtype']).str
+        return entry
+
+    entry['dtype'] = np.dtype(new_dtype).str
+
+    tmp_file = source + '.tmp'
+    old = map_array(path, column['file'], old_dtype, rows)
+    with open(tmp_file, 'wb') as f:
+        for start in range(0, rows, chunk_size):
+            convert(np.asarray(old[start:start + chunk_size])).tofile(f)
+    del old
+    os.replace(tmp_file, source)
+
+    return entry
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def stream_store(address, path, chunk_size = CHUNK_SIZE):
+    '''
+    Action: Writes the store of the csv file reading it in chunks of 'chunk_size'
+            rows, so the whole file is never in memory. Every chunk is cleaned
+            like in read_csv_data and appended to the column files of the store.
+            The cubes of the chunks are added to the aggregate cube only when
+            they have as many rows as it, so it is regrouped a few times instead
+            of once per chunk. The store is the same one build_store writes.
+
+            The memory used is that of a chunk plus the aggregate cube (which
+            has a row per combination of CUBE_DIMS found, it can't be smaller).
+    '''
+    tmp_path = path + '.tmp-' + str(os.getpid())
+    os.makedirs(tmp_path, exist_ok = True)
+
+    columns = None
+    cube = None
+    rows = 0
+
+    # Cubes of the chunks not added to 'cube' yet and their number of rows
+    pending = []
+    pending_rows = 0
+
+    # Municipalities of every department in order of appearance over all the chunks
+    dpto_munis = {}
+
+    with open(os.path.join(tmp_path, 'row_hash.bin'), 'wb') as hash_file:
+        for raw in pd.read_csv(address, usecols = READ_COL, dtype = str, chunksize = chunk_size):
+            row_hashes(raw).tofile(hash_file)
+            data = prepare_data(raw)
+
+            # State of every column, taken from the first chunk
+            if columns is None:
+                columns = []
+                for i, col in enumerate(data.columns):
+                    if pd.api.types.is_categorical_dtype(data[col]):
+                        kind = 'category'
+                    elif col in INTEGER_COL:
+                        kind = 'integer'
+                    else:
+                        kind = 'array'
+
+                    columns.append({'name': col, 'file': str(i) + '.bin', 'kind': kind, 'positions': {}, 'categories': [],
+                                    'empty': False, 'low': np.inf, 'high': -np.inf, 'dtype': None})
+
+            for column in columns:
+                append_column(column, data[column['name']], tmp_path)
+
+            for (dpto, munis) in region_munis(data).items():
+                found = dpto_munis.setdefault(dpto, [])
+                for muni in munis:
+                    if muni not in found:
+                        found.append(muni)
+
+            pending.append(build_cube(data))
+            pending_rows += len(pending[-1])
+            rows += len(data)
+
+            if cube is None or pending_rows >= len(cube):
+                cube = add_cubes(pending if cube is None else [cube] + pending)
+                (pending, pending_rows) = ([], 0)
+
+    # A csv file without rows is loaded at once
+    if columns is None:
+        shutil.rmtree(tmp_path)
+        build_store(address, path)
+        return
+
+    if pending:
+        cube = add_cubes([cube] + pending)
+
+    entries = [finish_column(column, tmp_path, rows, chunk_size) for column in columns]
+
+    # Departments and municipalities in order of appearance
+    dptos = next(column['categories'] for column in columns if column['name'] == 'Nombre departamento')
+    towns = next(column['categories'] for column in columns if column['name'] == 'Nombre municipio')
+
+    publish_store(tmp_path, path, address, rows, entries, cube, dptos, towns, dpto_munis)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def update_store(address, path, old_path):
+    '''
+    Action: Writes the store of the csv file from the store of a previous version
+            of the same file: only the new or changed rows are cleaned and only
+            their cases are added to (or taken from) the stored cube. The whole
+            csv is still read and hashed to find those rows and every column is
+            written again, so the time saved is only the cleaning of the
+            unchanged rows.
+
+    Output:
+        Returns False if the rows can't be matched (see update_data), in that
+        case nothing is written.
+    '''
+    (data, _, _) = load_store(old_path)
+
+    update = update_data(data, load_row_hash(old_path), read_raw_csv(address))
+    if update is None:
+        return False
+
+    (data, row_hash, removed, added) = update
+    (dptos, towns) = region_lists(data)
+
+    # Adding the changes to a cube about as large as the data costs more than making it again
+    cube = load_store_cube(old_path)
+    cube = update_cube(cube, removed, added) if 2 * len(cube) < len(data) else build_cube(data)
+
+    save_store(path, data, dptos, towns, cube, row_hash, address)
+
+    return True
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def source_stores(address, cache_dir = None, any_layout = False):
+    '''
+    Output:
+        Returns a list with the folders of all stores of the csv file in 'address'
+        (any version of its content), the newest first. With 'any_layout' the
+        stores written with another STORE_VERSION are listed too, the first
+        ones didn't save their 'source' and are taken as stores of the file.
+    '''
+    cache_dir = cache_folder(address, cache_dir)
+    source = os.path.abspath(address)
+
+    stores = []
+    if os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, name)
+            if not os.path.isfile(os.path.join(path, 'manifest.json')):
+                continue
+
+            manifest = read_manifest(path)
+            if manifest.get('version') == STORE_VERSION:
+                found = manifest.get('source') == source
+            else:
+                found = any_layout and manifest.get('source', source) == source
+
+            if found:
+                stores.append((manifest.get('created', 0), path))
+
+    return [path for (_, path) in sorted(stores, reverse = True)]
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def remove_stores(address, cache_dir = None, keep = ()):
+    '''
+    Action: Deletes the stores of all versions of the csv file but the folders
+            in 'keep', and its stores written with another STORE_VERSION, which
+            can't be read anymore. Sessions still using an old store keep their
+            memory maps.
+    '''
+    keep = [os.path.abspath(path) for path in keep]
+
+    for old_path in source_stores(address, cache_dir, any_layout = True):
+        if os.path.abspath(old_path) not in keep:
+            shutil.rmtree(old_path, ignore_errors = True)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def open_store(address, cache_dir = None, chunk_size = None, workers = 1, remove_previous = True):
+    '''
+    Action: Makes sure the store of the current content of the csv file exists.
+            If there is a store of a previous version of the file, the new store
+            is made incrementally from it (see update_store), otherwise the whole
+            csv is parsed. Stores of previous versions are deleted afterwards,
+            unless 'remove_previous' is False (see remove_stores).
+
+            With 'chunk_size' the csv is always read in chunks of that number
+            of rows (see stream_store), to bound the memory used. Otherwise
+            the whole csv is parsed by 'workers' processes (see build_store).
+
+    Output:
+        Returns the folder of the store.
+    '''
+    path = store_path(address, cache_dir)
+
+    # Stores left by a previous run (or another STORE_VERSION) are deleted even if
+    # this one was already written
+    if not os.path.isfile(os.path.join(path, 'manifest.json')):
+        previous = source_stores(address, cache_dir)
+
+        if chunk_size:
+            stream_store(address, path, chunk_size)
+        elif not (previous and update_store(address, path, previous[0])):
+            build_store(address, path, workers)
+
+    if remove_previous:
+        remove_stores(address, cache_dir, keep = [path])
+
+    return path
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def load_data(address, cache_dir = None, chunk_size = None, workers = 1):
+    '''
+    Action: Loads COVID-19's data from the store of the csv file, the store is
+            written first if it doesn't exist yet (see open_store).
+
+    Output:
+        Same tuple returned by read_csv_data.
+    '''
+    return load_store(open_store(address, cache_dir, chunk_size, workers))
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def build_region_index(data):
+    '''
+    Action: Groups the row positions of the DataFrame by department and by
+            municipality, so the rows of a region can be taken without
+            scanning or copying the whole DataFrame (see region_rows).
+
+    Input:
+        data -> DataFrame with 'Nombre departamento' and 'Nombre municipio' columns
+                (the case rows or the aggregate cube)
+
+    Output:
+        Returns a dictionary with:
+            'order'      -> ndarray with the row positions sorted by department and
+                            municipality (rows of a municipality keep their order).
+            'dptos'      -> {department: (start, end)} range of 'order' with its rows.
+            'munis'      -> {(department, municipality): (start, end)} range of 'order'
+                            with its rows.
+            'dpto_munis' -> {department: ndarray} municipalities of every department,
+                            in order of appearance.
+    '''
+    (dpto_codes, dpto_names) = pd.factorize(data['Nombre departamento'])
+    (muni_codes, muni_names) = pd.factorize(data['Nombre municipio'])
+    dpto_names = np.asarray(dpto_names)
+    muni_names = np.asarray(muni_names)
+
+    # Stable sort, empty fields (-1) go first and are skipped below
+    order = np.lexsort((muni_codes, dpto_codes))
+    dpto_sorted = dpto_codes[order]
+    muni_sorted = muni_codes[order]
+
+    # Range of every department in 'order'
+    starts = np.searchsorted(dpto_sorted, np.arange(len(dpto_names)), side = 'left')
+    ends = np.searchsorted(dpto_sorted, np.arange(len(dpto_names)), side = 'right')
+    dptos = {name: (start, end) for (name, start, end) in zip(dpto_names, starts.tolist(), ends.tolist())}
+
+    # Range of every (department, municipality) pair in 'order'
+    change = np.flatnonzero((np.diff(dpto_sorted) != 0) | (np.diff(muni_sorted) != 0)) + 1
+    starts = np.r_[0, change] if len(order) else np.empty(0, dtype = int)
+    ends = np.r_[change, len(order)] if len(order) else np.empty(0, dtype = int)
+
+    munis = {}
+    dpto_munis = {name: [] for name in dpto_names}
+    for (start, end) in zip(starts.tolist(), ends.tolist()):
+        (d, m) = (dpto_sorted[start], muni_sorted[start])
+        if d < 0 or m < 0:
+            continue
+
+        munis[(dpto_names[d], muni_names[m])] = (start, end)
+
+        # First row of the municipality, to list it in order of appearance
+        dpto_munis[dpto_names[d]].append((order[start], muni_names[m]))
+
+    dpto_munis = {name: np.array([muni for (_, muni) in sorted(found)], dtype = object)
+                  for (name, found) in dpto_munis.items()}
+
+    return {'order': order, 'dptos': dptos, 'munis': munis, 'dpto_munis': dpto_munis}
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def region_rows(data, index, dpto, muni = None):
+    '''
+    Inputs:
+        data  -> DataFrame used to build 'index'
+
+        index -> Dictionary returned by build_region_index
+
+        dpto  -> Name of the department
+
+        muni  -> Name of the municipality, None takes the whole department
+
+    Output:
+        Returns the rows of the region (a copy of those rows only), in the
+        same order they have in 'data'.
+    '''
+    if muni is None:
+        (start, end) = index['dptos'].get(dpto, (0, 0))
+
+        # Rows of a department are sorted by municipality in 'order'
+        rows = np.sort(index['order'][start:end])
+    else:
+        (start, end) = index['munis'].get((dpto, muni), (0, 0))
+        rows = index['order'][start:end]
+
+    return data.take(rows)
@@ -0,0 +1,205 @@
+# Reports of the dashboard without Streamlit.
+#
+# Every report (national, departmental or municipal, for each type of patients)
+# is made from the aggregate cube of the data store. The reports can be
+# precomputed to the store with precompute.py, so the dashboard only reads them.
+import os, json, pickle, hashlib, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from covid_data import open_store, load_store_cube, build_region_index, region_rows
+from covid_reports import slice_cube, cube_info, cube_patients
+from covid_profile import stage
+
+# Types of report and of patients, as in the filters of the dashboard
+REPORT_TYPES = ['Nacional', 'Departamental', 'Municipal']
+PATIENT_TYPES = ['Reportados', 'Fallecidos', 'Recuperados']
+
+# Folder inside the data store with the precomputed reports
+REPORTS_DIR = 'reports'
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def load_engine(address, cache_dir = None, chunk_size = None, workers = 1):
+    '''
+    Action: Opens the data store of the csv file (see open_store) and loads
+            what the reports need.
+
+    Output:
+        Returns a tuple with three items:
+            1. Folder of the data store.
+            2. Aggregate cube of the data (see build_cube).
+            3. Region index of the cube (see build_region_index).
+    '''
+    return load_store_engine(open_store(address, cache_dir, chunk_size, workers))
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def load_store_engine(path):
+    '''
+    Output:
+        Same tuple returned by load_engine, from the data store in 'path'.
+    '''
+    cube = load_store_cube(path)
+
+    return (path, cube, build_region_index(cube))
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def make_report(report_cube, key_list, dpto_summary, name, patients = 'Reportados'):
+    '''
+    Inputs:
+        report_cube  -> Rows of the cube of the region
+
+        key_list     -> Departments or municipalities of the summary (can be empty)
+
+        dpto_summary -> True: the summary is by department, False: by municipality
+
+        name         -> Name of the region
+
+        patients     -> 'Reportados', 'Fallecidos' or 'Recuperados'
+
+    Output:
+        Returns a dictionary with the data of every chart of the dashboard:
+            'name'      -> name of the region.
+            'cases'     -> sum of diagnostic cases per day.
+            'status'    -> summary of patients according to their health status.
+            'summary'   -> summary of data by department or municipality (None if empty).
+            'attention' -> summary of patients by case location.
+            'recovered' -> summary of patients by 'Recuperado' columns info.
+            'sex'       -> patients of the chosen type by sex (None if there are none).
+            'age'       -> patients of the chosen type by age range (None if there are none).
+    '''
+    with stage('get_info'):
+        (cases, status, summary, attention, recovered) = cube_info(report_cube, key_list, dpto_summary)
+
+    report = {'name': name, 'cases': cases, 'status': status, 'summary': summary,
+              'attention': attention, 'recovered': recovered, 'sex': None, 'age': None}
+
+    # Verifies if there are recovered and deceased cases according to the type of patients chosen
+    if (patients == 'Recuperados' and 'Recuperado' in recovered.index) or \
+       (patients == 'Fallecidos' and 'Fallecido' in recovered.index) or (patients == 'Reportados'):
+        with stage('sex and age'):
+            (report['sex'], report['age']) = cube_patients(slice_cube(report_cube, patients = patients))
+
+    return report
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def national_report(cube, index, patients = 'Reportados'):
+    '''
+    Output:
+        Report of the whole country (see make_report), summarized by department.
+    '''
+    return make_report(cube, list(index['dptos']), True, 'Colombia', patients)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def departmental_report(cube, index, dpto, patients = 'Reportados'):
+    '''
+    Output:
+        Report of the department (see make_report), summarized by municipality.
+    '''
+    return make_report(region_rows(cube, index, dpto), index['dpto_munis'][dpto], False, dpto, patients)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def municipal_report(cube, index, dpto, muni, patients = 'Reportados'):
+    '''
+    Output:
+        Report of the municipality (see make_report), without summary.
+    '''
+    return make_report(region_rows(cube, index, dpto, muni), [], True, muni, patients)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def get_report(cube, index, tipo, dpto = None, muni = None, patients = 'Reportados'):
+    '''
+    Action: Makes the report of the type in REPORT_TYPES ('tipo'), 'dpto' and
+            'muni' are used only by the reports that need them.
+    '''
+    if tipo == 'Nacional':
+        return national_report(cube, index, patients)
+    elif tipo == 'Departamental':
+        return departmental_report(cube, index, dpto, patients)
+    elif tipo == 'Municipal':
+        return municipal_report(cube, index, dpto, muni, patients)
+
+    raise ValueError('Unknown type of report: ' + str(tipo))
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def report_keys(index):
+    '''
+    Output:
+        Returns a list with the (tipo, dpto, muni, patients) tuple of every
+        report the dashboard can show.
+    '''
+    keys = []
+    for patients in PATIENT_TYPES:
+        keys.append(('Nacional', None, None, patients))
+
+        for dpto in index['dptos']:
+            keys.append(('Departamental', dpto, None, patients))
+
+            for muni in index['dpto_munis'][dpto]:
+                keys.append(('Municipal', dpto, muni, patients))
+
+    return keys
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def report_file(path, tipo, dpto = None, muni = None, patients = 'Reportados'):
+    '''
+    Output:
+        Returns the file of a precomputed report in the data store 'path'.
+    '''
+    key = json.dumps([tipo, dpto, muni, patients], ensure_ascii = False)
+
+    return os.path.join(path, REPORTS_DIR, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.pkl')
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def read_report(path, cube, index, tipo, dpto = None, muni = None, patients = 'Reportados'):
+    '''
+    Action: Reads the report if it was precomputed in the data store, otherwise
+            makes it from the cube.
+    '''
+    file = report_file(path, tipo, dpto, muni, patients)
+
+    if os.path.isfile(file):
+        with stage('read precomputed report'), open(file, 'rb') as f:
+            return pickle.load(f)
+
+    return get_report(cube, index, tipo, dpto, muni, patients)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+# Data used by the processes of precompute_reports
+_worker = {}
+
+def _init_worker(path):
+    cube = load_store_cube(path)
+    _worker.update(path = path, cube = cube, index = build_region_index(cube))
+
+def _save_report(key):
+    report = get_report(_worker['cube'], _worker['index'], *key)
+
+    file = report_file(_worker['path'], *key)
+    tmp_file = file + '.tmp-' + str(os.getpid())
+    with open(tmp_file, 'wb') as f:
+        pickle.dump(report, f, protocol = pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_file, file)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def precompute_reports(path, workers = 1):
+    '''
+    Action: Makes every report (see report_keys) of the data store 'path' in
+            'workers' processes and saves them in the store.
+
+    Output:
+        Returns the number of reports saved.
+    '''
+    os.makedirs(os.path.join(path, REPORTS_DIR), exist_ok = True)
+
+    _init_worker(path)
+    keys = report_keys(_worker['index'])
+
+    if workers > 1:
+        # Spawned processes, as in read_csv_parallel
+        with ProcessPoolExecutor(max_workers = workers, mp_context = multiprocessing.get_context('spawn'),
+                                 initializer = _init_worker, initargs = (path,)) as pool:
+            list(pool.map(_save_report, keys, chunksize = max(1, len(keys) // (workers * 8))))
+    else:
+        for key in keys:
+            _save_report(key)
+
+    return len(keys)
@@ -0,0 +1,195 @@
+# Charts of the dashboard made from the reports of covid_engine.py.
+#
+# The figures are made once per report and cached by the dashboard, the long
+# time series are downsampled before plotting. Their JSON is only made to
+# measure the size of the data sent to the browser.
+import gzip
+import numpy as np
+import plotly.express as px
+import plotly.io as pio
+
+from covid_profile import stage
+
+# Most points drawn in the time series charts, longer series are downsampled
+MAX_POINTS = 400
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def lttb(x, y, threshold):
+    '''
+    Action: Largest-Triangle-Three-Buckets downsampling: the first and last
+            points are kept, the rest are split in 'threshold' - 2 buckets and
+            the point of every bucket making the largest triangle with the point
+            kept before and the mean of the next bucket is kept, so peaks and
+            the shape of the series are preserved.
+
+    Inputs:
+        x         -> Numeric ndarray with the x values (increasing)
+
+        y         -> Numeric ndarray with the y values
+
+        threshold -> Number of points to keep
+
+    Output:
+        Returns an int ndarray with the positions of the points kept.
+    '''
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype = np.float64)
+    y = np.asarray(y, dtype = np.float64)
+
+    # Limits of the buckets between the first and the last point
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.int64)
+
+    kept = np.empty(threshold, dtype = np.int64)
+    kept[0] = 0
+    kept[-1] = n - 1
+
+    for i in range(threshold - 2):
+        (start, end) = (edges[i], edges[i + 1])
+
+        # Mean point of the next bucket (the last point for the last bucket)
+        if i + 2 < len(edges):
+            (next_x, next_y) = (x[end:edges[i + 2]].mean(), y[end:edges[i + 2]].mean())
+        else:
+            (next_x, next_y) = (x[-1], y[-1])
+
+        (prev_x, prev_y) = (x[kept[i]], y[kept[i]])
+        area = np.abs((prev_x - next_x) * (y[start:end] - prev_y) - (prev_x - x[start:end]) * (next_y - prev_y))
+        kept[i + 1] = start + np.argmax(area)
+
+    return kept
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def downsample(series, max_points = MAX_POINTS):
+    '''
+    Action: Downsamples a DataFrame indexed by date with lttb over its first column.
+
+    Output:
+        Returns the rows kept (all of them if there are 'max_points' or less).
+    '''
+    if len(series) <= max_points:
+        return series
+
+    x = series.index.to_numpy().astype('datetime64[ns]').astype(np.int64)
+    y = series[series.columns[0]].to_numpy()
+
+    return series.iloc[lttb(x, y, max_points)]
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def make_figures(report, tipo_reporte, tipo_grafica, max_points = MAX_POINTS):
+    '''
+    Inputs:
+        report       -> Dictionary returned by covid_engine.get_report
+
+        tipo_reporte -> 'Nacional', 'Departamental' or 'Municipal'
+
+        tipo_grafica -> 'Reportados', 'Fallecidos' or 'Recuperados'
+
+        max_points   -> Most points of the time series charts
+
+    Output:
+        Returns a dictionary with the figures of the dashboard, 'fig_C' is left
+        out in municipal reports and 'fig_D' and 'fig_E' when there are no
+        patients of the type chosen.
+    '''
+    report_name = report['name']
+    (a, b, c, e) = (report['cases'], report['status'], report['summary'], report['recovered'])
+
+    figures = {}
+
+    # Graph of accumulated diagnosed cases
+    figures['fig1'] = px.line(downsample(a.cumsum(), max_points), y = a.columns[0], labels={'fecha reporte web':'Fecha de reporte'},
+                              title = "Histórico de casos reportados en " + report_name)
+
+    # Graph of diagnostic cases per day
+    figures['fig2'] = px.line(downsample(a, max_points), y = a.columns[0], labels={'fecha reporte web':'Fecha de reporte'},
+                              title = "Histórico de casos diarios reportados en " + report_name)
+
+    # Pie diagram according to the location of the patient's case
+    figures['fig_A'] = px.pie(e.reset_index(), values='Número de pacientes', names='Recuperado',
+                              title='Distribución por atención de casos reportados')
+
+    # Pie diagram according to the status of the patients
+    figures['fig_B'] = px.pie(b.reset_index(), values='Número de pacientes', names='Estado',
+                              title='Distribución por estado de casos reportados')
+
+    # Summary report is made just if record type selected is either nacional or departamental
+    if tipo_reporte != 'Municipal':
+        figures['fig_C'] = px.bar(c, x = c.columns[0], y=[c.columns[4], c.columns[3], c.columns[2], c.columns[1]],
+                                  labels={c.columns[0]:'', 'value': 'Número de pacientes', 'variable': 'Variable'})
+
+    if report['sex'] is not None:
+        (sex_report, age_data) = (report['sex'], report['age'])
+
+        # Sex pie diagram according to the chosen distribution
+        figures['fig_D'] = px.pie(sex_report, values=sex_report.columns[1], names=sex_report.columns[0],
+                                  title='Distribución por sexo de casos ' + tipo_grafica.lower())
+
+        # Bar chart by age according to the chosen distribution
+        figures['fig_E'] = px.bar(age_data, x='Intervalos', y='Número de pacientes',
+                                  labels={'Intervalos': 'Edad'},height=400, title = "Distribución por edad de casos " + tipo_grafica.lower())
+
+    return figures
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def make_period_figures(window, regions, rolling_days, max_points = MAX_POINTS):
+    '''
+    Inputs:
+        window       -> DataFrame returned by covid_reports.window_report
+
+        regions      -> DataFrame returned by covid_reports.window_regions (None
+                        in municipal reports)
+
+        rolling_days -> Days of the rolling average in 'window'
+
+        max_points   -> Most points of the time series chart
+
+    Output:
+        Returns a dictionary with the figures of the selected period, 'fig_G'
+        is left out when there are no 'regions'.
+    '''
+    figures = {}
+
+    # Graph of diagnostic cases per day and their rolling average
+    figures['fig_F'] = px.line(downsample(window, max_points), y = [window.columns[0], window.columns[1]],
+                               labels={'fecha reporte web':'Fecha de reporte', 'value': 'Casos', 'variable': 'Variable'},
+                               title = "Casos diarios y promedio de {} días".format(rolling_days))
+
+    # Cases of the period by department or municipality, incidence if the regions have it
+    if regions is not None:
+        y_col = 'Incidencia por 100.000 hab.' if 'Incidencia por 100.000 hab.' in regions else 'Casos en el periodo'
+
+        figures['fig_G'] = px.bar(regions.sort_values(y_col, ascending = False), x = regions.columns[0], y = y_col,
+                                  labels={regions.columns[0]:''}, title = y_col + " por " + regions.columns[0].lower())
+
+    return figures
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def serialize_figures(figures):
+    '''
+    Output:
+        Returns a dictionary with the JSON of every figure.
+    '''
+    with stage('serialize figures'):
+        return {name: fig.to_json() for (name, fig) in figures.items()}
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def load_figure(payload):
+    '''
+    Output:
+        Returns the figure of a JSON made by serialize_figures (validated
+        again, the dashboard keeps the figures instead).
+    '''
+    return pio.from_json(payload)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def payload_sizes(payloads):
+    '''
+    Output:
+        Returns a dictionary with the size in bytes of every JSON payload,
+        as a tuple (plain, gzip compressed).
+    '''
+    return {name: (len(payload.encode('utf-8')), len(gzip.compress(payload.encode('utf-8'))))
+            for (name, payload) in payloads.items()}
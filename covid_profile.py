@@ -0,0 +1,181 @@
+# Timing and memory log of the stages of the dashboard.
+#
+# Every stage run inside 'with stage(name):' is saved with its wall time and,
+# when tracemalloc is tracing, the memory it allocated. The log is kept by the
+# server process and can be exported to a JSON or csv file.
+#
+# Every session of the dashboard runs the script in its own thread, so the run
+# being timed is kept per thread and the shared log is changed under a lock.
+import os, csv, json, time, threading, tracemalloc
+from contextlib import contextmanager
+
+# Stages timed, one dictionary per stage (see stage)
+TIMINGS = []
+
+# Most stages kept in TIMINGS, the oldest ones are dropped when a stage is saved
+# (processes that never start a run, like precompute.py, time stages too)
+MAX_TIMINGS = 10000
+
+# Hits and misses of every cached function, {name: {'hits': n, 'misses': n}}
+CACHE_COUNTS = {}
+
+# Number of the last run started by any session
+_last_run = {'id': 0}
+
+# Number and start of the run of the current thread (see new_run)
+_run = threading.local()
+
+# Guards TIMINGS, CACHE_COUNTS and '_last_run'
+_lock = threading.Lock()
+
+# Fields of every stage saved in TIMINGS
+LOG_FIELDS = ['run', 'stage', 'start', 'seconds', 'memory', 'peak']
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def new_run():
+    '''
+    Action: Starts a new run of the dashboard in the current thread, the stages
+            it times later are saved with its number.
+
+    Output:
+        Returns the number of the run.
+    '''
+    with _lock:
+        _last_run['id'] += 1
+        _run.id = _last_run['id']
+
+    _run.start = time.time()
+    _run.misses = {}
+
+    return _run.id
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def current_run():
+    '''
+    Output:
+        Returns the number of the run of the current thread (0 if it didn't
+        start any, see new_run).
+    '''
+    return getattr(_run, 'id', 0)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+@contextmanager
+def stage(name):
+    '''
+    Action: Times the code run inside 'with stage(name):' and saves it in TIMINGS:
+
+        'run'     -> number of the run (see new_run).
+        'stage'   -> name of the stage.
+        'start'   -> seconds since the run started.
+        'seconds' -> wall time of the stage.
+        'memory'  -> bytes allocated by the stage and still in use when it ends
+                     (None if tracemalloc isn't tracing).
+        'peak'    -> most bytes traced until the stage ends (None if tracemalloc
+                     isn't tracing).
+    '''
+    tracing = tracemalloc.is_tracing()
+    before = tracemalloc.get_traced_memory()[0] if tracing else None
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        (current, peak) = tracemalloc.get_traced_memory() if tracing else (None, None)
+
+        timing = {'run': current_run(), 'stage': name, 'start': round(time.time() - getattr(_run, 'start', 0) - seconds, 6),
+                  'seconds': seconds, 'memory': None if before is None else current - before, 'peak': peak}
+
+        with _lock:
+            TIMINGS.append(timing)
+            del TIMINGS[:-MAX_TIMINGS]
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+# Misses counted by cache_miss in the current thread, {name: n}
+def _thread_misses():
+    if not hasattr(_run, 'misses'):
+        _run.misses = {}
+    return _run.misses
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def cache_miss(name):
+    '''
+    Action: Counts a miss of the cached function 'name', it must be called in
+            the body of the function (which only runs when the cache misses).
+            The misses of the current thread are counted apart too, for
+            cached_call.
+    '''
+    with _lock:
+        CACHE_COUNTS.setdefault(name, {'hits': 0, 'misses': 0})['misses'] += 1
+
+    misses = _thread_misses()
+    misses[name] = misses.get(name, 0) + 1
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def cached_call(name, func, *args):
+    '''
+    Action: Calls the cached function 'func' as the stage 'name' and counts a hit
+            if its body didn't run in this thread (see cache_miss), the misses
+            of other sessions meanwhile don't change it.
+
+    Output:
+        Returns what 'func' returns.
+    '''
+    misses = _thread_misses().get(name, 0)
+
+    with stage(name):
+        result = func(*args)
+
+    if _thread_misses().get(name, 0) == misses:
+        with _lock:
+            CACHE_COUNTS.setdefault(name, {'hits': 0, 'misses': 0})['hits'] += 1
+
+    return result
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def run_timings(run = None):
+    '''
+    Output:
+        Returns the stages of the run (the one of the current thread if None)
+        in TIMINGS.
+    '''
+    run = current_run() if run is None else run
+
+    with _lock:
+        return [timing for timing in TIMINGS if timing['run'] == run]
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def cache_counts():
+    '''
+    Output:
+        Returns a copy of CACHE_COUNTS, which other sessions may be changing.
+    '''
+    with _lock:
+        return {name: dict(counts) for (name, counts) in CACHE_COUNTS.items()}
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def export_log(path):
+    '''
+    Action: Writes TIMINGS and CACHE_COUNTS to 'path', as JSON if its extension
+            is '.json' or as csv otherwise (the cache counts are written in
+            another file ending in '_cache.csv').
+    '''
+    with _lock:
+        timings = list(TIMINGS)
+    counts = cache_counts()
+
+    if os.path.splitext(path)[1].lower() == '.json':
+        with open(path, 'w', encoding = 'utf-8') as f:
+            json.dump({'timings': timings, 'cache': counts}, f, ensure_ascii = False, indent = 1)
+        return
+
+    with open(path, 'w', newline = '', encoding = 'utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames = LOG_FIELDS)
+        writer.writeheader()
+        writer.writerows(timings)
+
+    with open(os.path.splitext(path)[0] + '_cache.csv', 'w', newline = '', encoding = 'utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['function', 'hits', 'misses'])
+        for (name, function_counts) in counts.items():
+            writer.writerow([name, function_counts['hits'], function_counts['misses']])
@@ -0,0 +1,153 @@
+# Background refresh of the data store of the csv file.
+#
+# The sessions are served the last version of the data already built. A thread
+# checks the csv file every few seconds, builds the store of a new file while the
+# sessions keep using the previous one and then swaps the version served at once.
+import os, time, threading
+
+from covid_data import open_store, remove_stores
+from covid_engine import precompute_reports, REPORTS_DIR
+
+# Seconds between the checks of the csv file
+REFRESH_INTERVAL = 60
+
+# Seconds the csv file must stay unchanged before it is read (it may still be copied)
+SETTLE_TIME = 5
+
+# Version served of every csv file (see make_version) and the threads refreshing them
+_versions = {}
+_threads = {}
+
+# '_lock' guards the two dictionaries, '_build_lock' lets a single store be built at once
+_lock = threading.Lock()
+_build_lock = threading.Lock()
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def make_version(path, mtime):
+    '''
+    Output:
+        Returns a dictionary with the version of the data in the store 'path':
+            'path'      -> folder of the store.
+            'mtime'     -> modification time of the csv file it was built from.
+            'version'   -> version stamp (start of the hash of the csv content).
+            'refreshed' -> time it started to be served.
+    '''
+    return {'path': path, 'mtime': mtime, 'version': os.path.basename(path)[:10], 'refreshed': time.time()}
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def served_version(address):
+    '''
+    Output:
+        Returns the version served of the csv file (see make_version), None if
+        it wasn't loaded yet.
+    '''
+    with _lock:
+        return _versions.get(os.path.abspath(address))
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def build_version(address, cache_dir = None, chunk_size = None, workers = 1, precompute = False):
+    '''
+    Action: Builds the store of the current content of the csv file (see
+            open_store) keeping the stores of previous versions, which may still
+            be served. With 'precompute' all the reports are saved in it too.
+
+    Output:
+        Returns the new version (see make_version).
+    '''
+    with _build_lock:
+        mtime = os.path.getmtime(address)
+        path = open_store(address, cache_dir, chunk_size, workers, remove_previous = False)
+
+        if precompute:
+            precompute_reports(path, workers)
+
+    return make_version(path, mtime)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def swap_version(address, version, cache_dir = None):
+    '''
+    Action: Serves the new version of the csv file from now on and deletes the
+            stores of the other versions but the one served until now, which
+            sessions started before the swap may still be loading. It is
+            deleted by the next swap.
+    '''
+    with _lock:
+        previous = _versions.get(os.path.abspath(address))
+        _versions[os.path.abspath(address)] = version
+
+    remove_stores(address, cache_dir, keep = [version['path']] + ([previous['path']] if previous else []))
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def load_version(address, cache_dir = None, chunk_size = None, workers = 1):
+    '''
+    Output:
+        Returns the version served of the csv file. The first time (in every
+        server process) it is built by the caller, later ones by the refresher.
+    '''
+    version = served_version(address)
+
+    if version is None:
+        version = build_version(address, cache_dir, chunk_size, workers)
+
+        # Another session may have been served a newer version meanwhile
+        with _lock:
+            key = os.path.abspath(address)
+            if key in _versions and _versions[key]['mtime'] >= version['mtime']:
+                return _versions[key]
+
+        swap_version(address, version, cache_dir)
+
+    return version
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def refresh(address, cache_dir = None, chunk_size = None, workers = 1, precompute = False):
+    '''
+    Action: Builds and serves the csv file if it changed since the version
+            served and hasn't changed for SETTLE_TIME seconds. The reports are
+            precomputed with 'precompute' or if they were in the version served
+            (e.g. by precompute.py).
+
+    Output:
+        Returns True if a new version is served.
+    '''
+    version = served_version(address)
+    mtime = os.path.getmtime(address)
+
+    if (version is not None and mtime == version['mtime']) or time.time() - mtime < SETTLE_TIME:
+        return False
+
+    precompute = precompute or (version is not None and os.path.isdir(os.path.join(version['path'], REPORTS_DIR)))
+    swap_version(address, build_version(address, cache_dir, chunk_size, workers, precompute), cache_dir)
+
+    return True
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def refresh_loop(address, cache_dir, chunk_size, workers, interval, precompute):
+    '''
+    Action: Calls refresh every 'interval' seconds, forever.
+    '''
+    while True:
+        time.sleep(interval)
+
+        # A failed build (e.g. a csv file being replaced) is tried again later
+        try:
+            if refresh(address, cache_dir, chunk_size, workers, precompute):
+                print("Data refreshed: version {}".format(served_version(address)['version']))
+        except Exception as error:
+            print("Data refresh failed: {}".format(error))
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def start_refresher(address, cache_dir = None, chunk_size = None, workers = 1, interval = REFRESH_INTERVAL, precompute = False):
+    '''
+    Action: Starts the thread refreshing the csv file (see refresh_loop), just
+            once in every server process.
+    '''
+    key = os.path.abspath(address)
+
+    with _lock:
+        if key in _threads and _threads[key].is_alive():
+            return
+
+        _threads[key] = threading.Thread(target = refresh_loop, name = 'covid-refresh',
+                                         args = (address, cache_dir, chunk_size, workers, interval, precompute), daemon = True)
+        _threads[key].start()
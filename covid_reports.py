@@ -0,0 +1,716 @@
+# Reports of the COVID-19 positive cases shown in the dashboard.
+import numpy as np
+import pandas as pd
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def data_report(info, report, label, acum = False):
+    '''
+    Inputs:
+        acum   -> True:  process the accumulated sum
+                  False: process the partial sum
+
+        info   -> An object of type Pandas DataFrame with at least two columns:
+                  one called with name in 'report' param and the other 'ID de caso'
+                  this must be the second column of the Dataframe
+
+        report -> String with the column name of the report needed
+
+        label  -> String with the column name where the data sum will be written
+
+    Output:
+        Returns an object of type DataFrame from the pandas library whose index
+        is the param 'report' and has a single column whose name is the respective
+        param 'label'
+    '''
+    # Counts how many times each field in 'report' column is repeated and save
+    # it in 'ID de caso' column
+    # (only the categories found are taken in categorical columns)
+    info = info.groupby(report, observed = True).count()[[info.columns[1]]]
+
+    # 'ID de caso' is renamed to the string in 'label' param
+    info = info.rename(columns = {info.columns[0]:label})
+
+    # Acumulated sum in the 'report' column is made if 'acum' param is True
+    if acum :
+        info = info.cumsum()
+
+    return info
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def get_summary(info, key_list, dpto_info = True):
+    '''
+    Inputs:
+        info      -> An object of type DataFrame from pandas.
+
+        key_list  -> List with all the departments or municipalities
+                     to obtain the report.
+
+        dpto_info -> True: Departmental report (default)
+                     False: Municipal report.
+
+    Output:
+        Returns an object of type DataFrame with five columns:
+
+            1. Departamento/Municipio, name of the department
+               or municipality from which the report is made.
+
+            2. Casos confirmados, number of accumulated cases confirmed.
+
+            3. Recuperados, number of recovered cases.
+
+            4. Fallecidos, number of deceased cases.
+
+            5. Atendidos en UCI, number of cases seen in ICU.
+
+    All regions are counted in a single pass (see summarize_regions).
+    '''
+    return summarize_regions(info, key_list, dpto_info)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def summarize_regions(info, key_list, dpto_info = True, weights = None):
+    '''
+    Action: Makes the report of get_summary in a single pass: every row gets
+            the position of its region in 'key_list' and the counts are made
+            with np.bincount over it.
+
+    Inputs:
+        info      -> DataFrame with the case rows, or with the rows of the
+                     aggregate cube (see build_cube).
+
+        weights   -> None: every row is a case.
+                     String with the column of 'info' that has the number
+                     of cases of each row.
+
+    Output:
+        Same DataFrame returned by get_summary.
+    '''
+    if dpto_info:
+        region_col = 'Nombre departamento'
+        col_name = 'Departamento'
+    else:
+        region_col = 'Nombre municipio'
+        col_name = 'Municipio'
+
+    # The region may be the index of the information (departmental report)
+    if region_col not in info.columns:
+        info = info.reset_index()
+
+    region = info[region_col]
+
+    n_keys = len(key_list)
+
+    # Position of the region of every row in 'key_list' (-1 if it isn't there),
+    # for categoricals just the categories are looked up
+    if pd.api.types.is_categorical_dtype(region):
+        positions = pd.Index(key_list).get_indexer(region.cat.categories)
+        codes = region.cat.codes.to_numpy()
+        codes = np.where(codes >= 0, positions[codes], -1)
+    else:
+        codes = pd.Index(key_list).get_indexer(region)
+    in_list = codes >= 0
+
+    # Only rows with 'ID de caso' are counted as cases
+    if weights is None:
+        cases = np.ones(len(info), dtype = np.int64)
+        has_id = info['ID de caso'].notna().to_numpy() & in_list
+    else:
+        cases = info[weights].to_numpy()
+        has_id = in_list
+
+    location = info['Ubicación del caso']
+    recovered = info['Recuperado']
+
+    def equals(column, value):
+        return (column == value).to_numpy()
+
+    def count(mask):
+        return np.bincount(codes[mask], weights = cases[mask], minlength = n_keys).astype(np.int64)
+
+    rows = count(in_list)
+    diag_acum = count(has_id & info['fecha reporte web'].notna().to_numpy())
+    recu = count(has_id & equals(recovered, 'Recuperado'))
+    fallecidos = count(has_id & equals(location, 'Fallecido'))
+    UCI = count(has_id & equals(location, 'Hospital UCI'))
+
+    # A region with just one case is summarized by its case location only
+    # (recovered patients are taken from 'Ubicación del caso' too)
+    single = rows == 1
+    diag_acum = np.where(single, 1, diag_acum)
+    recu = np.where(single, count(in_list & equals(location, 'Recuperado')), recu)
+    fallecidos = np.where(single, count(in_list & equals(location, 'Fallecido')), fallecidos)
+    UCI = np.where(single, count(in_list & equals(location, 'Hospital UCI')), UCI)
+
+    info_dict = {}
+    info_dict.setdefault(col_name, key_list)
+    info_dict.setdefault('Confirmados', diag_acum.tolist())
+    info_dict.setdefault('Recuperados', recu.tolist())
+    info_dict.setdefault('Fallecidos', fallecidos.tolist())
+    info_dict.setdefault('En UCI', UCI.tolist())
+
+    df = pd.DataFrame(data=info_dict)
+    df = df.sort_values(by = 'Confirmados', ascending = False).reset_index()
+    df.pop('index')
+
+    return df
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def get_info(csv_data, key_list, dpto_summary = True):
+    '''
+    Inputs:
+        csv_data     -> Pandas DataFrame Type Object
+
+        key_list     -> List with all the departments or
+                        municipalities to obtain the report
+
+        dpto_summary -> True:  process the accumulated sum
+                        False: process the partial sum
+    Output:
+        Returns a tuple with five elements:
+
+        1. cases, sum of diagnostic cases per day.
+        2. status, summary of patients according to their health status.
+        3. dpto_info, summary of data by department or municipality.
+        4. atention, summary of patients by case location.
+        5. recu, summary of patients by 'Recuperado' columns info.
+    '''
+    # Cumulative sum of diagnosed patients
+    cases = data_report(csv_data, 'fecha reporte web', 'Casos diagnosticados')
+
+    # Gets all departments or municipalities summary report depending on
+    # 'dpto_summary' param
+    if len(key_list) == 0:
+        dpto_info = None
+    else:
+        dpto_info = get_summary(csv_data, key_list, dpto_summary)
+
+    # Patients according to the type of location of the case
+    atention = data_report(csv_data, 'Ubicación del caso', 'Número de pacientes')
+
+    # Patients according to medical status
+    status = data_report(csv_data, 'Estado', 'Número de pacientes')
+
+    # Patients according to the column 'Recuperado'
+    recu = data_report(csv_data, 'Recuperado', 'Número de pacientes')
+
+    return (cases, status, dpto_info, atention, recu)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+# Inclusive age range from left
+AGE_BINS = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 120]
+
+# Interval labels
+AGE_NAMES = ["0 - 9", "10 - 19", "20 - 29", "30 - 39", "40 - 49","50 - 59", "60 - 69", "70 - 79", "80 - 89",
+             "Mayor de 89"]
+
+# Number of units in a year for every value of 'Unidad de medida de edad'
+# (1: years, 2: months, 3: days), ages without unit are taken as years
+AGE_UNITS = {1: 1, 2: 12, 3: 365}
+
+# Age range schemes: bins (inclusive from left, in years) and interval labels
+AGE_SCHEMES = {'Decenal': (AGE_BINS, AGE_NAMES),
+               'Quinquenal': (list(range(0, 95, 5)) + [120],
+                              [str(age) + ' - ' + str(age + 4) for age in range(0, 90, 5)] + ["Mayor de 89"]),
+               'Ciclo de vida': ([0, 6, 12, 18, 29, 60, 120],
+                                 ["Primera infancia (0 - 5)", "Infancia (6 - 11)", "Adolescencia (12 - 17)",
+                                  "Juventud (18 - 28)", "Adultez (29 - 59)", "Vejez (60 o más)"])}
+
+# Columns of the aggregate cube, 'Edad' holds the age range of AGE_NAMES
+CUBE_DIMS = ['Nombre departamento', 'Nombre municipio', 'fecha reporte web', 'Recuperado', 'Estado',
+             'Ubicación del caso', 'Sexo', 'Edad']
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def age_years(age, unit = None):
+    '''
+    Inputs:
+        age  -> Values of the 'Edad' column
+
+        unit -> Values of the 'Unidad de medida de edad' column, None takes all
+                ages as years
+
+    Output:
+        Returns a float ndarray with the complete years of every age (nan if empty).
+    '''
+    years = np.asarray(age, dtype = np.float64)
+
+    if unit is not None:
+        unit = np.asarray(unit, dtype = np.float64)
+        per_year = np.ones(len(years))
+        for (code, units) in AGE_UNITS.items():
+            per_year[unit == code] = units
+
+        years = np.floor(years / per_year)
+
+    return years
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def age_codes(age, unit = None, bins = AGE_BINS):
+    '''
+    Output:
+        Returns an int ndarray with the position in 'bins' of the range of every
+        age (see age_years), -1 for empty ages or ages out of the bins.
+    '''
+    years = age_years(age, unit)
+    bins = np.asarray(bins)
+
+    codes = np.searchsorted(bins, years, side = 'right') - 1
+    codes[np.isnan(years) | (years < bins[0]) | (years >= bins[-1])] = -1
+
+    return codes
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def age_histogram(data, scheme = 'Decenal', by = None):
+    '''
+    Action: Counts the patients in every age range of the scheme for every
+            combination of the columns in 'by', all of them in one pass.
+
+    Inputs:
+        data   -> DataFrame returned by load_csv_data (or some of its rows)
+
+        scheme -> Key of AGE_SCHEMES, or a tuple with the bins and the labels
+
+        by     -> List of columns to group by (for example 'Nombre departamento'
+                  and 'Recuperado'), None counts all the patients together
+
+    Output:
+        Returns a DataFrame with a column for every age range, and a row for
+        every combination of 'by' with patients (a single row if 'by' is None).
+        Patients with empty fields in 'by' are left out.
+    '''
+    (bins, names) = AGE_SCHEMES[scheme] if isinstance(scheme, str) else scheme
+    unit = data['Unidad de medida de edad'] if 'Unidad de medida de edad' in data else None
+    bucket = age_codes(data['Edad'], unit, bins)
+
+    # Every combination of 'by' is numbered as a single group
+    by = [] if by is None else list(by)
+    group = np.zeros(len(data), dtype = np.int64)
+    uniques = []
+    for col in by:
+        (codes, unique) = pd.factorize(data[col], sort = True)
+        bucket = np.where(codes < 0, -1, bucket)
+        group = group * len(unique) + codes
+        uniques.append(unique)
+
+    n_groups = int(np.prod([len(unique) for unique in uniques]))
+    keep = bucket >= 0
+    counts = np.bincount(group[keep] * len(names) + bucket[keep], minlength = n_groups * len(names))
+    counts = counts.reshape(n_groups, len(names))
+
+    if len(by) == 0:
+        return pd.DataFrame(counts, columns = names)
+
+    index = pd.MultiIndex.from_product([np.asarray(unique) for unique in uniques], names = by)
+    histogram = pd.DataFrame(counts, index = index, columns = names)
+    histogram = histogram[counts.sum(axis = 1) > 0]
+
+    if len(by) == 1:
+        histogram.index = histogram.index.get_level_values(0)
+
+    return histogram
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def build_cube(data):
+    '''
+    Action: Precomputes the number of cases for every combination of CUBE_DIMS
+            found in the data, so the reports of the dashboard can be made from
+            this (much smaller) table instead of the case rows.
+
+    Input:
+        data -> DataFrame returned by load_csv_data
+
+    Output:
+        DataFrame with the columns in CUBE_DIMS plus 'Casos', the number of cases.
+        Empty fields (nan) are kept as a value of their column.
+    '''
+    columns = {col: data[col] for col in CUBE_DIMS}
+
+    # Ages (in years, see age_years) out of AGE_BINS are left empty
+    unit = data['Unidad de medida de edad'] if 'Unidad de medida de edad' in data else None
+    columns['Edad'] = pd.Categorical.from_codes(age_codes(data['Edad'], unit), categories = AGE_NAMES, ordered = True)
+
+    return group_cube(columns)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def group_cube(columns, cases = None):
+    '''
+    Action: Groups the rows by all the columns in CUBE_DIMS.
+
+    Inputs:
+        columns -> Dictionary with a Series for every column in CUBE_DIMS
+
+        cases   -> None: every row is a case.
+                   ndarray with the number of cases of every row.
+
+    Output:
+        DataFrame with the columns in CUBE_DIMS plus 'Casos' (see build_cube).
+    '''
+    # Every column is grouped by its integer codes (-1 for empty fields)
+    codes = {}
+    uniques = {}
+    for col in CUBE_DIMS:
+        (codes[col], uniques[col]) = pd.factorize(columns[col])
+
+    if cases is None:
+        cube = pd.DataFrame(codes).groupby(CUBE_DIMS, sort = False).size()
+    else:
+        codes['Casos'] = cases
+        cube = pd.DataFrame(codes).groupby(CUBE_DIMS, sort = False)['Casos'].sum()
+
+    cube = cube.rename('Casos').reset_index()
+
+    # The codes are changed back to their values (categoricals keep their categories)
+    for col in CUBE_DIMS:
+        code = cube[col].to_numpy()
+        unique = uniques[col]
+
+        if pd.api.types.is_categorical_dtype(unique):
+            cube[col] = pd.Categorical.from_codes(np.where(code >= 0, unique.codes[code], -1), dtype = unique.dtype)
+        else:
+            cube[col] = pd.Series(unique).reindex(code).to_numpy()
+
+    return cube
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def add_cubes(cubes):
+    '''
+    Action: Adds the cases of several cubes (cases can be negative to take them out).
+
+    Output:
+        Returns the cube with the total cases of every combination,
+        combinations without cases are left out.
+    '''
+    cubes = [cube.copy() for cube in cubes]
+
+    # Categoricals with different categories are joined with the (sorted) union of them
+    for col in CUBE_DIMS:
+        if not all(pd.api.types.is_categorical_dtype(cube[col]) for cube in cubes):
+            continue
+
+        categories = [cube[col].cat.categories for cube in cubes]
+        if all(categories[0].equals(other) for other in categories[1:]):
+            continue
+
+        union = categories[0]
+        for other in categories[1:]:
+            union = union.union(other)
+
+        for cube in cubes:
+            cube[col] = cube[col].cat.set_categories(union)
+
+    cube = pd.concat(cubes, ignore_index = True)
+    cube = group_cube({col: cube[col] for col in CUBE_DIMS}, cube['Casos'].to_numpy())
+    cube = cube[cube['Casos'] != 0].reset_index(drop = True)
+
+    for col in CUBE_DIMS:
+        if pd.api.types.is_categorical_dtype(cube[col]) and col != 'Edad':
+            cube[col] = cube[col].cat.remove_unused_categories()
+
+    return cube
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def update_cube(cube, removed, added):
+    '''
+    Action: Updates the cube of a DataFrame after some rows of the DataFrame
+            were taken out ('removed') and others were put in ('added').
+
+    Output:
+        Returns the updated cube
+    '''
+    removed = build_cube(removed)
+    removed['Casos'] = -removed['Casos']
+
+    return add_cubes([cube, build_cube(added), removed])
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def sort_cube(cube, dptos, dpto_munis):
+    '''
+    Action: Sorts the rows of the cube by department, in the order of 'dptos',
+            and by municipality, in the order of the list of its department in
+            'dpto_munis' (empty fields last), and then by the rest of CUBE_DIMS.
+            The cube of some data is the same one whichever way it was made (at
+            once, by chunks, in parallel or updated), and so are the regions
+            listed from it (see build_region_index).
+
+    Output:
+        Returns the sorted cube
+    '''
+    (dpto_codes, dpto_names) = pd.factorize(cube['Nombre departamento'])
+    (muni_codes, muni_names) = pd.factorize(cube['Nombre municipio'])
+    (dpto_names, muni_names) = (np.asarray(dpto_names), np.asarray(muni_names))
+
+    # Position of every department in 'dptos' (the last one for empty fields)
+    position = {name: i for (i, name) in enumerate(dptos)}
+    dpto_rank = np.array([position.get(name, len(position)) for name in dpto_names] + [len(position)])[dpto_codes]
+
+    # Position of every municipality in the list of its department, the same name can
+    # be in several departments so every (department, municipality) pair is ranked
+    # (empty fields and municipalities missing in the list go last)
+    position = {dpto: {muni: i for (i, muni) in enumerate(munis)} for (dpto, munis) in dpto_munis.items()}
+    last = max([len(munis) for munis in dpto_munis.values()] + [0])
+
+    (pair_codes, pairs) = pd.factorize((dpto_codes + 1) * (len(muni_names) + 1) + muni_codes + 1)
+    muni_rank = []
+    for pair in pairs.tolist():
+        (d, m) = (pair // (len(muni_names) + 1) - 1, pair % (len(muni_names) + 1) - 1)
+        found = position.get(dpto_names[d], {}) if d >= 0 else {}
+        muni_rank.append(found.get(muni_names[m], last) if m >= 0 else last)
+    muni_rank = np.array(muni_rank, dtype = np.int64)[pair_codes]
+
+    keys = [dpto_rank, muni_rank]
+    for col in CUBE_DIMS[2:]:
+        values = cube[col]
+
+        if pd.api.types.is_categorical_dtype(values):
+            keys.append(values.cat.codes.to_numpy())
+        else:
+            keys.append(pd.factorize(values, sort = True)[0])
+
+    # np.lexsort sorts by the last key first
+    return cube.take(np.lexsort(keys[::-1])).reset_index(drop = True)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def slice_cube(cube, dpto = None, muni = None, patients = 'Reportados'):
+    '''
+    Inputs:
+        cube     -> DataFrame returned by build_cube
+
+        dpto     -> Name of the department to take, None takes all of them
+
+        muni     -> Name of the municipality to take, None takes all of them
+
+        patients -> 'Reportados': all cases
+                    'Recuperados' or 'Fallecidos': cases whose 'Recuperado' column
+                    is 'Recuperado' or 'Fallecido' respectively
+
+    Output:
+        Returns the rows of the cube that match all the filters.
+    '''
+    mask = np.ones(len(cube), dtype = bool)
+
+    if dpto is not None:
+        mask &= (cube['Nombre departamento'] == dpto).to_numpy()
+
+    if muni is not None:
+        mask &= (cube['Nombre municipio'] == muni).to_numpy()
+
+    if patients != 'Reportados':
+        mask &= (cube['Recuperado'] == patients[0:len(patients)-1]).to_numpy()
+
+    return cube[mask]
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def cube_report(cube, report, label, acum = False):
+    '''
+    Action: Same report of data_report, made by adding the cases of the cube.
+    '''
+    info = cube.groupby(report, observed = True)[['Casos']].sum()
+
+    info = info.rename(columns = {'Casos':label})
+
+    if acum :
+        info = info.cumsum()
+
+    return info
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def cube_info(cube, key_list, dpto_summary = True):
+    '''
+    Action: Same tuple of get_info, made from the rows of the cube.
+    '''
+    cases = cube_report(cube, 'fecha reporte web', 'Casos diagnosticados')
+
+    if len(key_list) == 0:
+        dpto_info = None
+    else:
+        dpto_info = summarize_regions(cube, key_list, dpto_summary, weights = 'Casos')
+
+    atention = cube_report(cube, 'Ubicación del caso', 'Número de pacientes')
+    status = cube_report(cube, 'Estado', 'Número de pacientes')
+    recu = cube_report(cube, 'Recuperado', 'Número de pacientes')
+
+    return (cases, status, dpto_info, atention, recu)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def cube_patients(cube):
+    '''
+    Output:
+        Returns a tuple with the sex and age distributions of the cases in the cube:
+
+        1. DataFrame with columns 'Sexo' and 'Número de pacientes'.
+        2. DataFrame with columns 'Intervalos' (every range in AGE_NAMES)
+           and 'Número de pacientes'.
+    '''
+    sex_report = cube_report(cube, 'Sexo', 'Número de pacientes').reset_index()
+
+    # Cases added by the codes of the age ranges
+    codes = cube['Edad'].cat.codes.to_numpy()
+    keep = codes >= 0
+    counts = np.bincount(codes[keep], weights = cube['Casos'].to_numpy()[keep], minlength = len(AGE_NAMES))
+
+    age_data = pd.DataFrame({'Intervalos': AGE_NAMES, 'Número de pacientes': counts.astype(np.int64)})
+
+    return (sex_report, age_data)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def build_daily_counts(cube):
+    '''
+    Action: Precomputes the prefix sums of the cases reported per day in the
+            whole country, every department and every municipality, so the
+            cases of any date range are the difference of two prefix sums.
+
+    Input:
+        cube -> DataFrame returned by build_cube
+
+    Output:
+        Returns a dictionary with:
+            'dates'  -> DatetimeIndex with every day from the first to the last report.
+            'prefix' -> int64 ndarray with a row for every region and a column more
+                        than days: cases reported before every day (the last
+                        column is the total).
+            'rows'   -> {region: row of 'prefix'}, the region is None for the whole
+                        country, the department name or a (department, municipality)
+                        tuple.
+            'dptos'  -> ndarray with the departments, in the order of their rows.
+            'munis'  -> {department: ndarray} municipalities of every department,
+                        in the order of their rows.
+    '''
+    dates = cube['fecha reporte web']
+    cube = cube[dates.notna().to_numpy()]
+    dates = cube['fecha reporte web']
+
+    if len(cube) == 0:
+        return {'dates': pd.DatetimeIndex([]), 'prefix': np.zeros((1, 1), dtype = np.int64), 'rows': {None: 0},
+                'dptos': np.empty(0, dtype = object), 'munis': {}}
+
+    first = dates.min()
+    n_days = (dates.max() - first).days + 1
+    day = ((dates - first).dt.days).to_numpy()
+    cases = cube['Casos'].to_numpy()
+
+    # Every region is numbered: 0 the country, then departments, then municipalities
+    (dpto_codes, dpto_names) = pd.factorize(cube['Nombre departamento'], sort = True)
+    pairs = pd.MultiIndex.from_arrays([cube['Nombre departamento'], cube['Nombre municipio']])
+    (muni_codes, muni_pairs) = pd.factorize(pairs, sort = True)
+    dpto_names = np.asarray(dpto_names, dtype = object)
+
+    # Pairs with an empty department or municipality are left out
+    valid_pair = np.array([not pd.isna(d) and not pd.isna(m) for (d, m) in muni_pairs.tolist()], dtype = bool)
+    pair_position = np.cumsum(valid_pair) - 1
+    pairs = [pair for (pair, valid) in zip(muni_pairs.tolist(), valid_pair) if valid]
+
+    keys = [None] + dpto_names.tolist() + pairs
+
+    daily = np.zeros((len(keys), n_days), dtype = np.int64)
+    daily[0] = np.bincount(day, weights = cases, minlength = n_days)
+
+    keep = dpto_codes >= 0
+    daily[1:1 + len(dpto_names)] = np.bincount(dpto_codes[keep] * n_days + day[keep], weights = cases[keep],
+                                               minlength = len(dpto_names) * n_days).reshape(len(dpto_names), n_days)
+
+    keep = muni_codes >= 0
+    keep[keep] = valid_pair[muni_codes[keep]]
+    daily[1 + len(dpto_names):] = np.bincount(pair_position[muni_codes[keep]] * n_days + day[keep], weights = cases[keep],
+                                              minlength = len(pairs) * n_days).reshape(len(pairs), n_days)
+
+    prefix = np.zeros((len(keys), n_days + 1), dtype = np.int64)
+    np.cumsum(daily, axis = 1, out = prefix[:, 1:])
+
+    munis = {name: [] for name in dpto_names}
+    for (dpto, muni) in pairs:
+        munis[dpto].append(muni)
+
+    return {'dates': pd.date_range(first, periods = n_days, freq = 'D', name = 'fecha reporte web'), 'prefix': prefix,
+            'rows': {key: i for (i, key) in enumerate(keys)}, 'dptos': dpto_names,
+            'munis': {name: np.array(found, dtype = object) for (name, found) in munis.items()}}
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def window_range(daily, start = None, end = None):
+    '''
+    Output:
+        Returns the (first, last) columns of the prefix sums of the days from
+        'start' to 'end' (both included, None takes the first or last day), the
+        cases of the range of a region are prefix[last] - prefix[first].
+    '''
+    dates = daily['dates']
+    first = 0 if start is None else int(dates.searchsorted(pd.Timestamp(start), side = 'left'))
+    last = len(dates) if end is None else int(dates.searchsorted(pd.Timestamp(end), side = 'right'))
+
+    return (first, max(first, last))
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def window_report(daily, start = None, end = None, dpto = None, muni = None, window = 7):
+    '''
+    Inputs:
+        daily  -> Dictionary returned by build_daily_counts
+
+        start  -> First day of the range (None: first report)
+
+        end    -> Last day of the range (None: last report)
+
+        dpto   -> Department, None for the whole country
+
+        muni   -> Municipality of the department, None for the whole department
+
+        window -> Days of the rolling average
+
+    Output:
+        Returns a DataFrame indexed by 'fecha reporte web' with a row for every
+        day of the range and the columns 'Casos diagnosticados', 'Promedio de N
+        días' (rolling average of the last 'window' days) and 'Casos acumulados'
+        (since the first report). Only the days of the range are computed.
+    '''
+    key = dpto if muni is None else (dpto, muni)
+    prefix = daily['prefix'][daily['rows'][key]] if key in daily['rows'] else np.zeros(len(daily['dates']) + 1, dtype = np.int64)
+    (first, last) = window_range(daily, start, end)
+
+    days = np.arange(first, last)
+    total = prefix[days + 1]
+    since = np.maximum(days + 1 - window, 0)
+
+    return pd.DataFrame({'Casos diagnosticados': total - prefix[days],
+                         'Promedio de {} días'.format(window): (total - prefix[since]) / window,
+                         'Casos acumulados': total}, index = daily['dates'][first:last])
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def window_regions(daily, start = None, end = None, dpto = None, recent = 14, population = None):
+    '''
+    Inputs:
+        daily      -> Dictionary returned by build_daily_counts
+
+        start, end -> Range of days (see window_report)
+
+        dpto       -> None: summary by department, name: summary by municipality
+                      of the department
+
+        recent     -> Days before 'end' of the 'Últimos N días' column
+
+        population -> None or {region: inhabitants} (department names, or
+                      (department, municipality) tuples)
+
+    Output:
+        Returns a DataFrame with a row for every region and the columns 'Casos
+        en el periodo', 'Últimos N días' and, if 'population' is given,
+        'Incidencia por 100.000 hab.' (cases of the range per 100000
+        inhabitants, empty for regions without population).
+    '''
+    if dpto is None:
+        names = daily['dptos']
+        keys = names.tolist()
+        label = 'Departamento'
+    else:
+        names = daily['munis'].get(dpto, np.empty(0, dtype = object))
+        keys = [(dpto, muni) for muni in names]
+        label = 'Municipio'
+
+    rows = np.array([daily['rows'][key] for key in keys], dtype = np.int64)
+    prefix = daily['prefix'][rows]
+    (first, last) = window_range(daily, start, end)
+
+    summary = pd.DataFrame({label: names,
+                            'Casos en el periodo': prefix[:, last] - prefix[:, first],
+                            'Últimos {} días'.format(recent): prefix[:, last] - prefix[:, max(first, last - recent)]})
+
+    if population is not None:
+        inhabitants = np.array([population.get(key, np.nan) for key in keys], dtype = np.float64)
+        summary['Incidencia por 100.000 hab.'] = summary['Casos en el periodo'] / inhabitants * 100000
+
+    return summary
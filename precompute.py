@@ -0,0 +1,27 @@
+# Precomputes every report of the dashboard in the data store of the csv file,
+# without Streamlit. The dashboard reads the saved reports instead of making them.
+#
+# Usage:
+#       python precompute.py [csv_file] [--workers N] [--store-dir FOLDER] [--chunk-size ROWS]
+import os, time, argparse
+
+from covid_engine import load_engine, precompute_reports
+
+# COVID csv dataset file
+FILE = 'Casos_positivos_de_COVID-19_en_Colombia.csv'
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Precomputes the reports of the COVID-19 dashboard.')
+    parser.add_argument('csv_file', nargs = '?', default = FILE, help = 'csv dataset file')
+    parser.add_argument('--workers', type = int, default = os.cpu_count() or 1, help = 'number of processes')
+    parser.add_argument('--store-dir', default = None, help = 'folder of the data store (STORE_DIR of the dashboard)')
+    parser.add_argument('--chunk-size', type = int, default = None, help = 'rows read at once from the csv file')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    (path, _, _) = load_engine(args.csv_file, args.store_dir, args.chunk_size, args.workers)
+    print('Data store {} ready in {:.2f} s'.format(path, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    n_reports = precompute_reports(path, args.workers)
+    print('{} reports saved in {:.2f} s'.format(n_reports, time.perf_counter() - start))
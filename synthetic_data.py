@@ -0,0 +1,221 @@
+# Synthetic csv files with the columns of the COVID-19 dataset export, to measure
+# the dashboard at national scale without downloading the complete dataset.
+#
+# Usage:
+#       python synthetic_data.py rows output_csv [--seed N] [--days N]
+#
+# Cases are skewed by department and municipality (most of them in a few capitals),
+# follow two epidemic waves and include the dirty values cleaned by clean_data
+# ('f'/'m', 'casa'/'CASA', 'LEVE', district names as departments, empty fields).
+import argparse
+import numpy as np
+import pandas as pd
+
+# Department name, DIVIPOLA code and capital, ordered by number of cases
+DEPARTMENTS = [('BOGOTA', 11, 'BOGOTA'), ('ANTIOQUIA', 5, 'MEDELLIN'), ('VALLE', 76, 'CALI'),
+               ('ATLANTICO', 8, 'SOLEDAD'), ('SANTANDER', 68, 'BUCARAMANGA'), ('CUNDINAMARCA', 25, 'SOACHA'),
+               ('BOLIVAR', 13, 'MAGANGUE'), ('NORTE SANTANDER', 54, 'CUCUTA'), ('CORDOBA', 23, 'MONTERIA'),
+               ('TOLIMA', 73, 'IBAGUE'), ('HUILA', 41, 'NEIVA'), ('RISARALDA', 66, 'PEREIRA'), ('NARIÑO', 52, 'PASTO'),
+               ('META', 50, 'VILLAVICENCIO'), ('CALDAS', 17, 'MANIZALES'), ('CESAR', 20, 'VALLEDUPAR'),
+               ('BOYACA', 15, 'TUNJA'), ('MAGDALENA', 47, 'CIENAGA'), ('SUCRE', 70, 'SINCELEJO'), ('CAUCA', 19, 'POPAYAN'),
+               ('QUINDIO', 63, 'ARMENIA'), ('LA GUAJIRA', 44, 'RIOHACHA'), ('CASANARE', 85, 'YOPAL'),
+               ('CAQUETA', 18, 'FLORENCIA'), ('CHOCO', 27, 'QUIBDO'), ('PUTUMAYO', 86, 'MOCOA'), ('ARAUCA', 81, 'ARAUCA'),
+               ('AMAZONAS', 91, 'LETICIA'), ('SAN ANDRES', 88, 'SAN ANDRES'), ('GUAVIARE', 95, 'SAN JOSE DEL GUAVIARE'),
+               ('VICHADA', 99, 'PUERTO CARREÑO'), ('GUAINIA', 94, 'INIRIDA'), ('VAUPES', 97, 'MITU')]
+
+# Districts reported as departments in the export (clean_data changes them): name, DIVIPOLA code,
+# department and municipality
+DISTRICTS = [('BARRANQUILLA', 8001, 'ATLANTICO', 'BARRANQUILLA'), ('CARTAGENA', 13001, 'BOLIVAR', 'CARTAGENA'),
+             ('STA MARTA D.E.', 47001, 'MAGDALENA', 'SANTA MARTA'), ('Buenaventura D.E.', 76109, 'VALLE', 'BUENAVENTURA')]
+
+# Names of municipalities found in several departments, as in the export
+SHARED_MUNIS = ['LA UNION', 'BOLIVAR', 'CALDAS', 'LA VEGA', 'SAN PEDRO', 'EL CARMEN', 'ALBANIA', 'CORDOBA']
+
+# Values of the categorical columns and their probabilities, with the dirty values of the export
+SEXO = (['F', 'M', 'f', 'm'], [0.47, 0.47, 0.03, 0.03])
+CONTAGIO = (['Relacionado', 'En estudio', 'Importado'], [0.55, 0.44, 0.01])
+RECUPERADO = (['Recuperado', 'Activo', 'Fallecido', 'fallecido', 'N/A'], [0.86, 0.09, 0.025, 0.005, 0.02])
+UBICACION = (['Casa', 'casa', 'CASA', 'Hospital', 'Hospital UCI', None], [0.86, 0.02, 0.02, 0.07, 0.015, 0.015])
+ESTADO = (['Leve', 'LEVE', 'leve', 'Moderado', 'moderado', 'Grave', 'Asintomático', None],
+          [0.74, 0.03, 0.03, 0.07, 0.01, 0.015, 0.095, 0.01])
+PAISES = (['ESPAÑA', 'ESTADOS UNIDOS DE AMÉRICA', 'ITALIA', 'ECUADOR', 'FRANCIA', 'TURQUÍA'],
+          [724, 840, 380, 218, 250, 792])
+
+# Columns of the csv file, in the order of the export
+COLUMNS = ['fecha reporte web', 'ID de caso', 'Fecha de notificación', 'Código DIVIPOLA departamento', 'Nombre departamento',
+           'Código DIVIPOLA municipio', 'Nombre municipio', 'Edad', 'Unidad de medida de edad', 'Sexo', 'Tipo de contagio',
+           'Ubicación del caso', 'Estado', 'Código ISO del país', 'Nombre del país', 'Recuperado', 'Fecha de inicio de síntomas',
+           'Fecha de muerte', 'Fecha de diagnóstico', 'Fecha de recuperación', 'Tipo de recuperación', 'Pertenencia étnica',
+           'Nombre del grupo étnico']
+
+# First report date of the export
+FIRST_DAY = '2020-03-06'
+
+# Rows made and written at once
+CHUNK_SIZE = 500000
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def make_regions(rng):
+    '''
+    Output:
+        Returns a DataFrame with a row for every municipality: its department
+        (as written in the export), the DIVIPOLA codes and the probability of
+        a case. Departments follow a Zipf-like skew and the cases of every
+        department are mostly in its capital. Some municipality names are in
+        several departments (see SHARED_MUNIS).
+    '''
+    regions = []
+    dpto_weights = 1 / np.arange(1, len(DEPARTMENTS) + 1) ** 1.1
+
+    for ((dpto, code, capital), weight) in zip(DEPARTMENTS, dpto_weights):
+        n_munis = 1 if dpto in ('BOGOTA', 'SAN ANDRES') else int(rng.integers(6, 60))
+        munis = [capital] + [dpto + ' MUNICIPIO ' + str(i) for i in range(2, n_munis + 1)]
+
+        # Two of the first municipalities have names used in other departments too
+        if n_munis >= 4:
+            munis[2:4] = rng.choice(SHARED_MUNIS, 2, replace = False).tolist()
+        muni_weights = 1 / np.arange(1, n_munis + 1) ** 1.5
+
+        for (i, (muni, muni_weight)) in enumerate(zip(munis, muni_weights / muni_weights.sum())):
+            regions.append((dpto, code, muni, code * 1000 + i + 1, weight * muni_weight))
+
+    # The districts take cases from their department
+    for (district, code, dpto, muni) in DISTRICTS:
+        weight = dpto_weights[[d[0] for d in DEPARTMENTS].index(dpto)] * 0.4
+        regions.append((district, code, muni, code, weight))
+
+    regions = pd.DataFrame(regions, columns = ['dpto', 'dpto_code', 'muni', 'muni_code', 'weight'])
+    regions['weight'] /= regions['weight'].sum()
+
+    return regions
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def report_days(rng, rows, days):
+    '''
+    Output:
+        Returns a sorted int ndarray with the day (since FIRST_DAY) each case
+        was reported, following two epidemic waves.
+    '''
+    t = np.arange(days)
+    curve = np.exp(-((t - days * 0.35) / (days * 0.1)) ** 2) + 1.4 * np.exp(-((t - days * 0.75) / (days * 0.08)) ** 2) + 0.02
+
+    return np.repeat(t, rng.multinomial(rows, curve / curve.sum()))
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def date_strings(days):
+    '''
+    Output:
+        Returns an object ndarray with the date of every day since FIRST_DAY
+        written as in the export ('d/m/yyyy 0:00:00'), so dates are written
+        by indexing it.
+    '''
+    dates = pd.date_range(FIRST_DAY, periods = days, freq = 'D')
+
+    return np.array(['{}/{}/{} 0:00:00'.format(d.day, d.month, d.year) for d in dates], dtype = object)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def choose(rng, values, rows):
+    '''
+    Output:
+        Returns an object ndarray with 'rows' values taken from the tuple
+        (values, probabilities).
+    '''
+    return np.array(values[0], dtype = object)[rng.choice(len(values[0]), size = rows, p = values[1])]
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def make_chunk(rng, first_id, day, regions, dates):
+    '''
+    Inputs:
+        rng      -> numpy random Generator
+
+        first_id -> 'ID de caso' of the first row
+
+        day      -> int ndarray with the report day of every row (see report_days)
+
+        regions  -> DataFrame returned by make_regions
+
+        dates    -> ndarray returned by date_strings, with some days more than
+                    the last report day (for recovery and death dates)
+
+    Output:
+        Returns a DataFrame with the columns in COLUMNS.
+    '''
+    rows = len(day)
+    last = len(dates) - 1
+    empty = np.full(rows, None, dtype = object)
+    date = lambda offset: dates[np.clip(day + offset, 0, last)]
+
+    region = regions.iloc[rng.choice(len(regions), size = rows, p = regions['weight'].to_numpy())]
+
+    # Ages in years, with some babies in months or days
+    unit = rng.choice([1, 2, 3], size = rows, p = [0.985, 0.012, 0.003])
+    age = np.clip(rng.gamma(4.5, 8.5, size = rows).astype(np.int64), 1, 105)
+    age = np.where(unit == 2, rng.integers(1, 12, size = rows), np.where(unit == 3, rng.integers(1, 30, size = rows), age))
+
+    recuperado = choose(rng, RECUPERADO, rows)
+    dead = (recuperado == 'Fallecido') | (recuperado == 'fallecido')
+    recovered = recuperado == 'Recuperado'
+
+    ubicacion = np.where(dead, 'Fallecido', choose(rng, UBICACION, rows))
+    estado = np.where(dead, 'Fallecido', choose(rng, ESTADO, rows))
+
+    contagio = choose(rng, CONTAGIO, rows)
+    imported = contagio == 'Importado'
+    country = rng.integers(0, len(PAISES[0]), size = rows)
+
+    symptoms = date(-rng.integers(2, 10, size = rows))
+    symptoms[rng.random(rows) < 0.1] = None
+
+    return pd.DataFrame({'fecha reporte web': date(0),
+                         'ID de caso': np.arange(first_id, first_id + rows),
+                         'Fecha de notificación': date(-rng.integers(0, 8, size = rows)),
+                         'Código DIVIPOLA departamento': region['dpto_code'].to_numpy(),
+                         'Nombre departamento': region['dpto'].to_numpy(),
+                         'Código DIVIPOLA municipio': region['muni_code'].to_numpy(),
+                         'Nombre municipio': region['muni'].to_numpy(),
+                         'Edad': age,
+                         'Unidad de medida de edad': unit,
+                         'Sexo': choose(rng, SEXO, rows),
+                         'Tipo de contagio': contagio,
+                         'Ubicación del caso': ubicacion,
+                         'Estado': estado,
+                         'Código ISO del país': np.where(imported, np.array(PAISES[1], dtype = object)[country], empty),
+                         'Nombre del país': np.where(imported, np.array(PAISES[0], dtype = object)[country], empty),
+                         'Recuperado': recuperado,
+                         'Fecha de inicio de síntomas': symptoms,
+                         'Fecha de muerte': np.where(dead, date(rng.integers(0, 21, size = rows)), empty),
+                         'Fecha de diagnóstico': date(0),
+                         'Fecha de recuperación': np.where(recovered, date(rng.integers(7, 31, size = rows)), empty),
+                         'Tipo de recuperación': np.where(recovered, np.where(rng.random(rows) < 0.6, 'PCR', 'Tiempo'), empty),
+                         'Pertenencia étnica': rng.choice([6, 5, 1, 3], size = rows, p = [0.9, 0.05, 0.03, 0.02]),
+                         'Nombre del grupo étnico': empty}, columns = COLUMNS)
+#=======================================================================================================================================#
+#=======================================================================================================================================#
+def write_synthetic_csv(address, rows, seed = 0, days = 500):
+    '''
+    Action: Writes a synthetic csv file of 'rows' cases reported over 'days'
+            days, in chunks of CHUNK_SIZE rows. The same seed always writes
+            the same file.
+    '''
+    rng = np.random.default_rng(seed)
+    regions = make_regions(rng)
+    day = report_days(rng, rows, days)
+    dates = date_strings(days + 31)
+
+    with open(address, 'w', encoding = 'utf-8', newline = '') as f:
+        for start in range(0, rows, CHUNK_SIZE):
+            chunk = make_chunk(rng, start + 1, day[start:start + CHUNK_SIZE], regions, dates)
+            chunk.to_csv(f, index = False, header = (start == 0))
+
+        if rows == 0:
+            pd.DataFrame(columns = COLUMNS).to_csv(f, index = False)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Writes a synthetic csv file of COVID-19 cases in Colombia.')
+    parser.add_argument('rows', type = int, help = 'number of cases')
+    parser.add_argument('output_csv', help = 'csv file to write')
+    parser.add_argument('--seed', type = int, default = 0, help = 'seed of the random values')
+    parser.add_argument('--days', type = int, default = 500, help = 'days of reports')
+    args = parser.parse_args()
+
+    write_synthetic_csv(args.output_csv, args.rows, args.seed, args.days)